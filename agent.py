@@ -1,12 +1,17 @@
 # agent.py
+import json
 import numpy as np
 import random
 import os
+import time
 from config import *
 
+CHECKPOINT_VERSION = 1
+
 class QLearningAgent:
     def __init__(self):
         self.q_table = np.zeros((4, 2))
+        self.visits = np.zeros((4, 2), dtype=np.int64) # Updates applied per (state, action)
         self.lr = LEARNING_RATE
         self.gamma = DISCOUNT_FACTOR
         self.epsilon = EPSILON_START
@@ -17,14 +22,37 @@ class QLearningAgent:
             return random.randrange(2)
         return np.argmax(self.q_table[state, :])
 
+    def choose_actions(self, states, rng):
+        # Batched epsilon-greedy for many environments at once
+        greedy = np.argmax(self.q_table[states], axis=1)
+        explore = rng.random(len(states)) < self.epsilon
+        return np.where(explore, rng.integers(0, 2, len(states)), greedy)
+
     def learn(self, state, action, reward, next_state):
         old_value = self.q_table[state, action]
         next_max = np.max(self.q_table[next_state, :])
         new_value = (1 - self.lr) * old_value + self.lr * (reward + self.gamma * next_max)
         self.q_table[state, action] = new_value
+        self.visits[state, action] += 1
+
+    def learn_batch(self, states, actions, rewards, next_states):
+        # Targets are taken from the table before the update. n transitions that
+        # share a (state, action) pair are folded into one step: n updates towards
+        # their mean target shrink the old value by (1 - lr)^n.
+        n_actions = self.q_table.shape[1]
+        flat = np.asarray(states) * n_actions + np.asarray(actions)
+        targets = rewards + self.gamma * np.max(self.q_table[next_states], axis=1)
+        counts = np.bincount(flat, minlength=self.q_table.size)
+        sums = np.bincount(flat, weights=targets, minlength=self.q_table.size)
+        hit = counts > 0
+        q = self.q_table.reshape(-1)
+        keep = (1 - self.lr) ** counts[hit]
+        q[hit] = keep * q[hit] + (1 - keep) * sums[hit] / counts[hit]
+        self.visits += counts.reshape(self.visits.shape)
 
-    def decay_epsilon(self):
-        if self.epsilon > EPSILON_MIN:
+    def decay_epsilon(self, episodes=1):
+        for _ in range(episodes):
+            if self.epsilon <= EPSILON_MIN: break
             self.epsilon *= EPSILON_DECAY
         
     def save(self): 
@@ -36,4 +64,46 @@ class QLearningAgent:
             self.q_table = np.load(Q_TABLE_FILENAME)
             print(f"Q-table loaded from {Q_TABLE_FILENAME}")
             return True
-        return False
\ No newline at end of file
+        return False
+
+    # --- Checkpoints ---
+    def save_checkpoint(self, path=CHECKPOINT_FILE, episode=0, extra=None):
+        # Table, visits, epsilon, hyperparameters and the random / np.random
+        # states in one .npz. Written to a temp file and renamed over `path`,
+        # so a crash mid-write leaves the previous checkpoint intact.
+        np_state = np.random.get_state()
+        meta = {"version": CHECKPOINT_VERSION, "episode": episode, "epsilon": self.epsilon,
+                "hyperparameters": {"lr": self.lr, "gamma": self.gamma,
+                                    "epsilon_decay": EPSILON_DECAY, "epsilon_min": EPSILON_MIN},
+                "random_state": random.getstate(), "np_random_state": [np_state[0], *np_state[2:]],
+                "saved_at": time.time(), "extra": extra or {}}
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, q_table=self.q_table, visits=self.visits, np_random_key=np_state[1],
+                     meta=np.array(json.dumps(meta)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def load_checkpoint(self, path=CHECKPOINT_FILE, restore_rng=True):
+        # Returns the checkpoint metadata (episode, extra, ...) or None if absent
+        if not os.path.exists(path): return None
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta["version"] > CHECKPOINT_VERSION:
+                raise ValueError(f"{path} is checkpoint version {meta['version']}, newer than this code ({CHECKPOINT_VERSION})")
+            self.q_table = data["q_table"]
+            self.visits = data["visits"]
+            np_key = data["np_random_key"]
+        self.epsilon = meta["epsilon"]
+        saved = meta["hyperparameters"]
+        current = {"lr": self.lr, "gamma": self.gamma, "epsilon_decay": EPSILON_DECAY, "epsilon_min": EPSILON_MIN}
+        changed = [k for k in current if saved.get(k) != current[k]]
+        if changed: print(f"Warning: {', '.join(changed)} differ from the checkpoint; using the current values")
+        if restore_rng:
+            version, state, gauss = meta["random_state"]
+            random.setstate((version, tuple(state), gauss))
+            name, pos, has_gauss, cached = meta["np_random_state"]
+            np.random.set_state((name, np_key, pos, has_gauss, cached))
+        print(f"Checkpoint loaded from {path} (episode {meta['episode']})")
+        return meta
\ No newline at end of file
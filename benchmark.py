@@ -0,0 +1,190 @@
+# benchmark.py
+# Headless, fixed-seed performance suite. Each benchmark yields named metrics;
+# results can be saved as a JSON baseline and later runs compared against it,
+# failing (exit status 1) when a metric regresses by more than the threshold.
+#
+#   python benchmark.py --save              # record the baseline
+#   python benchmark.py                     # compare against it
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import numpy as np
+
+from config import *
+from environment import MazeGame
+from enemy import Enemy, EnemySwarm
+from utils import a_star_path
+
+SEED = 1234
+
+def _seed(offset=0):
+    random.seed(SEED + offset)
+    np.random.seed(SEED + offset)
+
+def _best_rate(fn, count, repeats):
+    # Operations per second of the fastest of `repeats` runs of fn()
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+# --- Benchmarks (each returns {metric: (value, higher_is_better)}) ---
+def bench_generation(quick, repeats):
+    # Latency percentiles, so every maze counts (repeats unused)
+    results = {}
+    for label, size, count in [("default", (GRID_HEIGHT, GRID_WIDTH), 300), ("201x201", (201, 201), 30)]:
+        _seed()
+        game = MazeGame({"enemies": 3, "keys": 1, "traps": 5, "height": size[0], "width": size[1]})
+        count = count // 5 if quick else count
+        latencies = []
+        for _ in range(count):
+            start = time.perf_counter()
+            game.generate_maze()
+            latencies.append(time.perf_counter() - start)
+        for p in (50, 90, 99):
+            results[f"generate_{label}_p{p}_ms"] = (1000 * float(np.percentile(latencies, p)), False)
+    return results
+
+def bench_astar(quick, repeats):
+    results = {}
+    for label, size in [("small", (GRID_HEIGHT, GRID_WIDTH)), ("large", (201, 201))]:
+        _seed(1)
+        game = MazeGame({"enemies": 0, "keys": 1, "traps": 0, "height": size[0], "width": size[1]})
+        cells = [tuple(c) for c in np.argwhere(game.grid == EMPTY).tolist()]
+        count = 50 if quick else 200
+        queries = [(random.choice(cells), random.choice(cells)) for _ in range(count)]
+        a_star_path(game.grid, *queries[0]) # Warm the passability mask
+        def run():
+            for start, end in queries: a_star_path(game.grid, start, end)
+        results[f"astar_{label}_qps"] = (_best_rate(run, count, repeats), True)
+    return results
+
+def bench_enemies(quick, repeats):
+    results = {}
+    _seed(2)
+    game = MazeGame({"enemies": 0, "keys": 1, "traps": 0, "height": 101, "width": 101})
+    cells = np.argwhere(game.grid == EMPTY)
+    steps = 200 if quick else 1000
+    for count in sorted({1, 3, NUM_ENEMIES, 10, 100, 1000}): # Default sizes and large swarms
+        spawn = [cells[i] for i in np.random.choice(len(cells), count)]
+        swarm = EnemySwarm(game.grid, [Enemy(game.grid, [pos]) for pos in spawn], np.random.default_rng(SEED))
+        def run():
+            for _ in range(steps): swarm.step()
+        results[f"enemy_swarm_{count}_steps_per_sec"] = (_best_rate(run, steps, repeats), True)
+    return results
+
+def bench_training(quick, repeats):
+    import main as train_main
+    from agent import QLearningAgent
+    from vector_env import train_batched
+    results = {}
+
+    # main.py's loop as `main.py --headless` runs it, inside a scratch
+    # directory so its checkpoint and Q-table never touch the real ones
+    episodes = 300 if quick else 1000
+    def run_main():
+        _seed(3)
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+            os.chdir(tmp)
+            try: train_main.main(["--headless", "--fresh", "--episodes", str(episodes)])
+            finally: os.chdir(cwd)
+    results["train_main_episodes_per_sec"] = (_best_rate(run_main, episodes, repeats), True)
+
+    episodes = 500 if quick else 3000
+    def run_batched():
+        with contextlib.redirect_stdout(io.StringIO()): # Silence progress lines
+            train_batched(QLearningAgent(), episodes, 64, seed=SEED)
+    results["train_batched_episodes_per_sec"] = (_best_rate(run_batched, episodes, repeats), True)
+    return results
+
+BENCHMARKS = {
+    "generation": bench_generation,
+    "astar": bench_astar,
+    "enemies": bench_enemies,
+    "training": bench_training,
+}
+
+# --- Baseline ---
+def run_suite(names, quick=False, repeats=3, metrics=None):
+    # Adds one sample per metric to `metrics`; a metric's value is the median
+    # of its samples, so a regression has to show up in most re-runs to count
+    metrics = {} if metrics is None else metrics
+    for name in names:
+        start = time.perf_counter()
+        for metric, (value, higher) in BENCHMARKS[name](quick, repeats).items():
+            samples = metrics[metric]["samples"] + [value] if metric in metrics else [value]
+            metrics[metric] = {"value": float(np.median(samples)), "samples": samples,
+                               "higher_is_better": higher, "benchmark": name}
+        print(f"[{name}] done in {time.perf_counter() - start:.1f}s")
+    return metrics
+
+def compare(metrics, baseline, threshold):
+    # Returns the names of metrics worse than baseline by more than `threshold`
+    regressions = []
+    print(f"{'metric':<40}{'baseline':>14}{'current':>14}{'change':>10}")
+    for name, current in metrics.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<40}{'-':>14}{current['value']:>14.3f}{'new':>10}")
+            continue
+        change = current["value"] / base["value"] - 1
+        worse = -change if current["higher_is_better"] else change
+        flag = "  REGRESSION" if worse > threshold else ""
+        if flag: regressions.append(name)
+        print(f"{name:<40}{base['value']:>14.3f}{current['value']:>14.3f}{change:>+10.1%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Performance benchmarks with baseline comparison")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--baseline", default=BENCH_BASELINE)
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=BENCH_THRESHOLD,
+                        help="allowed relative slowdown before failing (0.2 = 20%%)")
+    parser.add_argument("--quick", action="store_true", help="smaller workloads (smoke test)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--confirm", type=int, default=2, help="re-runs of regressed benchmarks before failing")
+    args = parser.parse_args()
+
+    metrics = run_suite(args.only, args.quick, args.repeats)
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({"python": platform.python_version(), "numpy": np.__version__,
+                       "machine": platform.machine(), "quick": args.quick, "metrics": metrics}, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline) as f: baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}; run with --save first")
+        for name, m in metrics.items(): print(f"{name:<40}{m['value']:>14.3f}")
+        return 0
+    if baseline.get("quick") != args.quick:
+        print("Warning: baseline and current run use different workload sizes (--quick)")
+    regressions = compare(metrics, baseline["metrics"], args.threshold)
+    for _ in range(args.confirm):
+        if not regressions: break
+        # Re-run the suspects: each run adds a sample, and the median decides
+        suspects = sorted({metrics[name]["benchmark"] for name in regressions})
+        print(f"Re-running {', '.join(suspects)} to confirm...")
+        run_suite(suspects, args.quick, args.repeats, metrics)
+        regressions = compare(metrics, baseline["metrics"], args.threshold)
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    print("No regressions.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,35 @@
 # config.py
 
 # --- Game Configuration ---
-GRID_WIDTH = 40
+GRID_WIDTH = 40    # Defaults; MazeGame takes "width"/"height" in its config
 GRID_HEIGHT = 25
 CELL_SIZE = 20
 WINDOW_WIDTH = GRID_WIDTH * CELL_SIZE
 WINDOW_HEIGHT = GRID_HEIGHT * CELL_SIZE + 100
 FPS = 60
+SIM_BASE_RATE = 5         # main_app sim ticks/sec at Game Speed 1; each speed step doubles it
+SIM_UNCAPPED_SPEED = 10   # Game Speed that runs the sim flat out
+MAX_SIM_LAG = 0.25        # Seconds of sim time a single frame may catch up on
+EVAL_MAX_TICKS = 10000    # Headless evaluation: ticks before an episode counts as a timeout loss
 
 # --- Training Configuration ---
 VISUALIZE_TRAINING = False  # Set to True to watch it learn
+SHOW_TRAINING_PLOT = True   # Win-rate plot when main.py finishes (skipped with --headless)
 LOAD_Q_TABLE_IF_EXISTS = True
 SAVE_Q_TABLE_ON_EXIT = True
 Q_TABLE_FILENAME = "q_table.npy"
+CHECKPOINT_FILE = "checkpoint.npz"  # Resumable training state (table, epsilon, episode, RNG)
+CHECKPOINT_EVERY = 500      # Episodes between checkpoints (main.py saves on the next maze change)
 NEW_MAZE_FREQUENCY = 50
+BATCH_NUM_ENVS = 256        # Mazes stepped in lockstep by vector_env.py
+NUM_WORKERS = None          # parallel_train.py processes (None = all cores)
+WORKER_NUM_ENVS = 64        # Mazes per worker process
+SYNC_EPISODES = 1000        # Episodes per worker between Q-table merges
+STREAM_WINDOW_ROWS = 64     # Grid rows held by streaming_maze.WindowedMazeGame
+MAZE_CORPUS = None          # Path of a maze_corpus.py file to load mazes from (None = generate live)
+CORPUS_SEED = 0             # Seed of the corpus visiting order
+BENCH_BASELINE = "benchmark_baseline.json"  # Written by benchmark.py --save
+BENCH_THRESHOLD = 0.2       # Relative slowdown benchmark.py tolerates before failing
 
 # --- RL Hyperparameters ---
 TOTAL_EPISODES = 3000
@@ -34,6 +50,9 @@ STEP_PENALTY = -1
 NUM_ENEMIES = 4       # Enough to be annoying, not impossible
 ENEMY_SPEED_DELAY = 0 # 0 = Fast (Moves every frame), 2 = Slow
 ENEMY_PENALTY = -100
+SWARM_VECTOR_MIN = 64 # Swarms this large step with NumPy, smaller ones in plain Python (measured crossover)
+DANGER_RADIUS = 2 # Cells within this Manhattan distance of an enemy are unsafe for the agent
+SPACETIME_HORIZON = 200 # Ticks of enemy movement predicted by spacetime.py
 
 # --- Colors ---
 WHITE=(255,255,255); BLACK=(0,0,0); GREEN=(40,180,99); RED=(231,76,60)
@@ -42,4 +61,4 @@ CYAN=(26,188,156); PATH_COLOR=(220, 220, 220)
 PURPLE = (155, 89, 182)
 
 # --- Cell Types ---
-EMPTY=0; WALL=1; TRAP=5; KEY=4; GOAL=3
\ No newline at end of file
+EMPTY=0; WALL=1; TRAP=5; KEY=4; GOAL=3
@@ -0,0 +1,143 @@
+# dstar_lite.py
+# Incremental replanning (D* Lite, Koenig & Likhachev). The search runs
+# backwards from the target, so when the agent moves or a few cells become
+# blocked/unblocked only the affected part of the search tree is repaired
+# instead of re-running A* from scratch.
+import heapq
+from config import *
+
+INF = float('inf')
+
+class DStarLite:
+    """Incremental planner towards one fixed target on one grid.
+
+    Like a_star_path, stepping into a cell costs 1 unless it is a WALL, a TRAP
+    or one of the temporary obstacles (e.g. enemy-occupied cells); the start
+    cell itself is never checked. Paths exclude the start and include the target.
+    """
+    def __init__(self, grid, target):
+        self.grid = grid
+        self.height, self.width = grid.shape
+        self.static_blocked = ((grid == WALL) | (grid == TRAP)).ravel().tolist()
+        self.obstacles = set()
+        self.target = target[0] * self.width + target[1]
+        self.start = None
+        self.km = 0
+        self.g = {}
+        self.rhs = {self.target: 0}
+        self.queued = {}
+        self.heap = []
+        self.expansions = 0
+
+    # --- Graph ---
+    def _neighbors(self, idx):
+        r, c = divmod(idx, self.width)
+        if c + 1 < self.width: yield idx + 1
+        if c > 0: yield idx - 1
+        if r + 1 < self.height: yield idx + self.width
+        if r > 0: yield idx - self.width
+
+    def _blocked(self, idx):
+        return self.static_blocked[idx] or idx in self.obstacles
+
+    def _h(self, a, b):
+        ar, ac = divmod(a, self.width)
+        br, bc = divmod(b, self.width)
+        return abs(ar - br) + abs(ac - bc)
+
+    # --- D* Lite core ---
+    def _key(self, u):
+        best = min(self.g.get(u, INF), self.rhs.get(u, INF))
+        return (best + self._h(self.start, u) + self.km, best)
+
+    def _update_vertex(self, u):
+        if u != self.target:
+            best = INF
+            for s in self._neighbors(u):
+                if not self._blocked(s):
+                    best = min(best, 1 + self.g.get(s, INF))
+            self.rhs[u] = best
+        if self.g.get(u, INF) != self.rhs.get(u, INF):
+            key = self._key(u)
+            self.queued[u] = key
+            heapq.heappush(self.heap, (key, u))
+        else:
+            self.queued.pop(u, None)
+
+    def _compute_shortest_path(self):
+        heap, queued, g, rhs = self.heap, self.queued, self.g, self.rhs
+        while heap:
+            k_old, u = heap[0]
+            if queued.get(u) != k_old:
+                heapq.heappop(heap) # Stale entry
+                continue
+            if not (k_old < self._key(self.start) or rhs.get(self.start, INF) != g.get(self.start, INF)):
+                break
+            heapq.heappop(heap)
+            del queued[u]
+            self.expansions += 1
+            k_new = self._key(u)
+            if k_old < k_new:
+                queued[u] = k_new
+                heapq.heappush(heap, (k_new, u))
+            elif g.get(u, INF) > rhs.get(u, INF):
+                g[u] = rhs[u]
+                for p in self._neighbors(u): self._update_vertex(p)
+            else:
+                g[u] = INF
+                self._update_vertex(u)
+                for p in self._neighbors(u): self._update_vertex(p)
+
+    # --- Public API ---
+    def _cells_changed(self, cells):
+        # Only edges *into* a changed cell change cost, so its neighbours need repair
+        for v in cells:
+            for u in self._neighbors(v): self._update_vertex(u)
+
+    def set_obstacles(self, positions):
+        # Replaces the temporary obstacle set; only the difference is repaired
+        new = {r * self.width + c for r, c in positions}
+        changed = self.obstacles ^ new
+        self.obstacles = new
+        if self.start is not None: self._cells_changed(changed)
+
+    def refresh_cell(self, pos):
+        # Call after editing grid[pos] in place (e.g. a new trap)
+        idx = pos[0] * self.width + pos[1]
+        self.static_blocked[idx] = self.grid[pos] in (WALL, TRAP)
+        if self.start is not None: self._cells_changed([idx])
+
+    def plan(self, start):
+        start = start[0] * self.width + start[1]
+        if self.start is None:
+            self.start = start
+            self.queued[self.target] = self._key(self.target)
+            heapq.heappush(self.heap, (self.queued[self.target], self.target))
+        elif start != self.start:
+            self.km += self._h(self.start, start)
+            self.start = start
+        self._compute_shortest_path()
+
+        if self.g.get(start, INF) == INF and start != self.target: return None
+        path, current = [], start
+        while current != self.target:
+            best, best_cost = None, INF
+            for s in self._neighbors(current):
+                if not self._blocked(s) and 1 + self.g.get(s, INF) < best_cost:
+                    best, best_cost = s, 1 + self.g.get(s, INF)
+            if best is None or len(path) > len(self.static_blocked): return None
+            path.append(divmod(best, self.width))
+            current = best
+        return path
+
+class IncrementalPlanner:
+    """Keeps one DStarLite per (grid, target) so repeated plans reuse its state."""
+    def __init__(self):
+        self.planner = None
+
+    def plan(self, grid, start, target, obstacles=()):
+        p = self.planner
+        if p is None or p.grid is not grid or p.target != target[0] * p.width + target[1]:
+            p = self.planner = DStarLite(grid, target)
+        p.set_obstacles(obstacles)
+        return p.plan(start)
@@ -1,10 +1,19 @@
+import copy
 import random
+import numpy as np
 from config import *
 
+# Canonical direction order (Right, Left, Down, Up) plus "stay" for stuck enemies
+DIRECTIONS = np.array([(0, 1), (0, -1), (1, 0), (-1, 0), (0, 0)])
+REVERSE = np.array([1, 0, 3, 2, 4])
+DIR_BITS = np.array([1, 2, 4, 8], dtype=np.uint8)
+_BIT_OF = {(0, 1): 1, (0, -1): 2, (1, 0): 4, (-1, 0): 8}
+_REVERSE = REVERSE.tolist()
+
 class Enemy:
     def __init__(self, grid, available_cells):
         self.grid_height, self.grid_width = grid.shape
-        self.pos = random.choice(available_cells)
+        self.pos = tuple(random.choice(available_cells))
         self.directions = [(0, 1), (0, -1), (1, 0), (-1, 0)] # Right, Left, Down, Up
         
         # Pick an initial random valid direction to start moving
@@ -59,4 +68,258 @@ class Enemy:
     def is_valid_move(self, grid, r, c):
         return (0 <= r < self.grid_height and 
                 0 <= c < self.grid_width and 
-                grid[r, c] != WALL)
\ No newline at end of file
+                grid[r, c] != WALL)
+
+def open_direction_mask(grid):
+    """Per-cell bitmask of the directions an Enemy may step into.
+
+    Bit i is set when direction i of Enemy.directions' canonical order
+    (Right, Left, Down, Up) leads to an in-bounds, non-wall cell.
+    """
+    open_cells = (grid != WALL).astype(np.uint8)
+    mask = np.zeros(grid.shape, dtype=np.uint8)
+    mask[:, :-1] |= open_cells[:, 1:]        # Right
+    mask[:, 1:] |= open_cells[:, :-1] << 1   # Left
+    mask[:-1, :] |= open_cells[1:, :] << 2   # Down
+    mask[1:, :] |= open_cells[:-1, :] << 3   # Up
+    return mask
+
+def choose_directions(masks, current, rng):
+    """Enemy.move's turn rule for whole arrays of enemies.
+
+    masks are the open_direction_mask values under each enemy and current
+    their DIRECTIONS indices. Picks a random open direction other than
+    straight back, reversing only at dead ends. Returns the chosen indices
+    and whether each enemy can move at all.
+    """
+    valid = (masks[..., None] & DIR_BITS) > 0
+    backward = REVERSE[current]
+    forward = valid & (np.arange(4) != backward[..., None])
+    scores = rng.random(forward.shape)
+    scores[~forward] = -1
+    choice = np.where(forward.any(axis=-1), scores.argmax(axis=-1), backward)
+    return choice, valid.any(axis=-1)
+
+class EnemySwarm:
+    """Every enemy of one maze, advanced together by step().
+
+    Same rules as Enemy.move (move delay, no U-turn, reverse only at dead
+    ends), but the open directions come from a per-cell table built once per
+    maze. Swarms of SWARM_VECTOR_MIN enemies or more move in a handful of
+    NumPy ops; smaller ones step in plain Python over lists, where NumPy's
+    per-call overhead would cost more than the loop it replaces. Both modes
+    draw the same random numbers, so predict() is exact for either.
+    """
+    def __init__(self, grid, enemies=(), rng=None):
+        # Seeded from `random` so random.seed() still fixes enemy behaviour
+        self.rng = rng if rng is not None else np.random.default_rng(random.getrandbits(64))
+        self.open_dirs = open_direction_mask(grid)
+        self.move_delay = ENEMY_SPEED_DELAY
+        self._width = width = grid.shape[1]
+        lookup = [tuple(d) for d in DIRECTIONS.tolist()]
+        cells = [e.pos[0] * width + e.pos[1] for e in enemies]
+        dirs = [lookup.index(tuple(e.current_dir)) for e in enemies]
+        timers = [e.timer for e in enemies]
+        self._open_list = None # open_dirs as a flat list, for the plain-Python paths
+
+        self.danger_radius = DANGER_RADIUS
+        self.vectorized = len(cells) >= SWARM_VECTOR_MIN
+        if self.vectorized:
+            self._pos = np.array([divmod(c, width) for c in cells], dtype=np.int64).reshape(-1, 2)
+            self._dir = np.array(dirs, dtype=np.int64)
+            self._timer = np.array(timers, dtype=np.int64)
+            self._build_index(grid.shape)
+        else:
+            # A handful of enemies: queries scan these lists, no index needed
+            self._open_list = self.open_dirs.ravel().tolist()
+            self._cells, self._dirs, self._timers = cells, dirs, timers
+            self._moves = [] # Flat (from, to) of the last step's moves
+
+    def _build_index(self, shape):
+        # --- Spatial index (vectorized swarms) ---
+        # occupancy: enemies per cell. danger: enemies within danger_radius
+        # (Manhattan) of each cell, padded by the radius so stamps never clip.
+        # entered: DIR_BITS of the moves that ended in each cell last step.
+        # step() only queues its moves; the first query after it applies them.
+        rad = self.danger_radius
+        width = shape[1]
+        padded_width = width + 2 * rad
+        self.occupancy = np.zeros(shape, dtype=np.int32)
+        self.danger = np.zeros((shape[0] + 2 * rad, padded_width), dtype=np.int32)
+        self.entered = np.zeros(shape, dtype=np.uint8)
+        self._entered_cells = np.empty(0, dtype=np.int64)
+        self._pending = [] # (old cells, new cells, directions) per unapplied step
+
+        # Flat index offsets of the danger diamond, and per direction the cells
+        # a one-cell move leaves (-1) and enters (+1), relative to the old cell
+        dr, dc = np.mgrid[-rad:rad + 1, -rad:rad + 1]
+        diamond = {(r, c) for r, c in zip(dr.ravel().tolist(), dc.ravel().tolist()) if abs(r) + abs(c) <= rad}
+        self._diamond = np.array([r * padded_width + c for r, c in diamond])
+        self._move_offsets, self._move_signs = [], []
+        for mr, mc in DIRECTIONS[:4].tolist(): # Movers never "stay"
+            moved = {(r + mr, c + mc) for r, c in diamond}
+            cells = sorted(diamond - moved) + sorted(moved - diamond)
+            self._move_offsets.append([r * padded_width + c for r, c in cells])
+            self._move_signs.append([-1] * len(diamond - moved) + [1] * len(moved - diamond))
+        self._move_offsets = np.array(self._move_offsets)
+        self._move_signs = np.array(self._move_signs, dtype=np.int32)
+        self._padded_width = padded_width
+
+        np.add.at(self.occupancy.reshape(-1), self._pos[:, 0] * width + self._pos[:, 1], 1)
+        centres = (self._pos[:, 0] + rad) * padded_width + self._pos[:, 1] + rad
+        np.add.at(self.danger.reshape(-1), (centres[:, None] + self._diamond).ravel(), 1)
+
+    def __len__(self):
+        return len(self._pos) if self.vectorized else len(self._cells)
+
+    # Positions, directions and timers as arrays, whichever mode holds them
+    @property
+    def pos(self):
+        if self.vectorized: return self._pos
+        return np.array([divmod(c, self._width) for c in self._cells], dtype=np.int64).reshape(-1, 2)
+
+    @property
+    def dir(self):
+        return self._dir if self.vectorized else np.array(self._dirs, dtype=np.int64)
+
+    @property
+    def timer(self):
+        return self._timer if self.vectorized else np.array(self._timers, dtype=np.int64)
+
+    def step(self):
+        if not self.vectorized: return self._step_small()
+        no_moves = self._entered_cells[:0]
+        if len(self._pending) >= 64: self._apply_pending() # Bound the queue when nothing queries
+        self._pending.append((no_moves, no_moves, no_moves))
+        if not len(self._pos): return
+        self._timer += 1
+        moving = np.nonzero(self._timer >= self.move_delay)[0]
+        if not len(moving): return
+        self._timer[moving] = 0
+
+        r, c = self._pos[moving, 0], self._pos[moving, 1]
+        choice, can_move = choose_directions(self.open_dirs[r, c], self._dir[moving], self.rng)
+        moving = moving[can_move]
+        dirs = self._dir[moving] = choice[can_move]
+        old = self._pos[moving, 0] * self._width + self._pos[moving, 1]
+        self._pos[moving] += DIRECTIONS[dirs]
+        new = self._pos[moving, 0] * self._width + self._pos[moving, 1]
+        self._pending[-1] = (old, new, dirs)
+
+    def _apply_pending(self):
+        # Index update for the queued steps: only the cells their moves touched
+        if not self._pending: return
+        last_new, last_dirs = self._pending[-1][1:]
+        old, new, dirs = (np.concatenate(parts) for parts in zip(*self._pending))
+        self._pending = []
+        np.add.at(self.occupancy.reshape(-1), np.concatenate([old, new]),
+                  np.repeat(np.array([-1, 1], dtype=np.int32), len(old)))
+        rad = self.danger_radius
+        centres = (old // self._width + rad) * self._padded_width + old % self._width + rad
+        np.add.at(self.danger.reshape(-1), (centres[:, None] + self._move_offsets[dirs]).ravel(),
+                  self._move_signs[dirs].ravel())
+        self.entered.reshape(-1)[self._entered_cells] = 0
+        self._entered_cells = last_new
+        np.bitwise_or.at(self.entered.reshape(-1), last_new, DIR_BITS[last_dirs])
+
+    def _step_small(self):
+        # choose_directions' draws and turn rule, one enemy at a time
+        cells, dirs, timers = self._cells, self._dirs, self._timers
+        masks, reverse, width = self._open_list, _REVERSE, self._width
+        self._moves = moves = []
+        moving = []
+        for i in range(len(cells)):
+            timers[i] += 1
+            if timers[i] >= self.move_delay:
+                timers[i] = 0
+                moving.append(i)
+        if not moving: return
+        scores = self.rng.random(4 * len(moving)).tolist()
+        for j, i in enumerate(moving):
+            mask, back = masks[cells[i]], reverse[dirs[i]]
+            if not mask: continue
+            best, choice = -1.0, back
+            for d in range(4):
+                if mask >> d & 1 and d != back and scores[4 * j + d] > best:
+                    best, choice = scores[4 * j + d], d
+            dirs[i] = choice
+            to = cells[i] + (1, -1, width, -width)[choice]
+            moves.append((cells[i], to))
+            cells[i] = to
+
+    def predict(self):
+        """Yields what each coming step() will do, without changing the swarm:
+        (flat cells after the step, flat (from, to) pairs of the enemies that
+        moved). A copy of the RNG draws exactly the numbers step() will, so the
+        prediction is exact; plain Python, cheap for a handful of enemies."""
+        width = self._width
+        if self._open_list is None: self._open_list = self.open_dirs.ravel().tolist()
+        masks, reverse = self._open_list, _REVERSE
+        offsets = [1, -1, width, -width]
+        rng = copy.deepcopy(self.rng)
+        if self.vectorized:
+            cells = (self._pos[:, 0] * width + self._pos[:, 1]).tolist()
+            dirs, timers = self._dir.tolist(), self._timer.tolist()
+        else:
+            cells, dirs, timers = list(self._cells), list(self._dirs), list(self._timers)
+        while True:
+            moves = []
+            moving = []
+            for i in range(len(cells)):
+                timers[i] += 1
+                if timers[i] >= self.move_delay:
+                    timers[i] = 0
+                    moving.append(i)
+            if moving:
+                # Same draws and turn rule as choose_directions
+                scores = rng.random(4 * len(moving)).tolist()
+                for j, i in enumerate(moving):
+                    mask, back = masks[cells[i]], reverse[dirs[i]]
+                    if not mask: continue
+                    best, choice = -1.0, back
+                    for d in range(4):
+                        if mask >> d & 1 and d != back and scores[4 * j + d] > best:
+                            best, choice = scores[4 * j + d], d
+                    dirs[i] = choice
+                    moves.append((cells[i], cells[i] + offsets[choice]))
+                    cells[i] += offsets[choice]
+            yield list(cells), moves
+
+    # --- Queries: the spatial index for vectorized swarms, a scan otherwise ---
+    def occupies(self, pos):
+        if not self.vectorized: return pos[0] * self._width + pos[1] in self._cells
+        self._apply_pending()
+        return bool(self.occupancy[pos])
+
+    def is_safe(self, pos):
+        # No enemy within danger_radius (Manhattan) of pos
+        rad = self.danger_radius
+        if not self.vectorized:
+            r, c = pos
+            for cell in self._cells:
+                er, ec = divmod(cell, self._width)
+                if abs(er - r) + abs(ec - c) <= rad: return False
+            return True
+        self._apply_pending()
+        return not self.danger[pos[0] + rad, pos[1] + rad]
+
+    def swapped(self, frm, to):
+        # Some enemy just moved to -> frm while the agent moved frm -> to
+        if not self.vectorized:
+            width = self._width
+            return (to[0] * width + to[1], frm[0] * width + frm[1]) in self._moves
+        self._apply_pending()
+        bit = _BIT_OF.get((frm[0] - to[0], frm[1] - to[1]))
+        return bool(bit) and bool(self.entered[frm] & bit)
+
+    def positions(self):
+        if self.vectorized: return [tuple(p) for p in self._pos.tolist()]
+        return [divmod(c, self._width) for c in self._cells]
+
+    def sync(self, enemies):
+        # Writes the swarm state back into Enemy objects (for per-object code)
+        for enemy, p, d, t in zip(enemies, self.pos.tolist(), self.dir.tolist(), self.timer.tolist()):
+            enemy.pos = tuple(p)
+            enemy.current_dir = tuple(DIRECTIONS[d].tolist())
+            enemy.timer = t
+        return enemies
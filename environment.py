@@ -1,9 +1,11 @@
-import pygame
 import numpy as np
 import random
+from array import array
 from config import *
-from utils import a_star_path, manhattan_distance
-from enemy import Enemy
+from utils import bfs_distances, flood_fill, held_karp_order, mark_route, path_from_field
+from enemy import Enemy, EnemySwarm
+from path_oracle import TreePathOracle
+from maze_corpus import MazeCorpus
 
 class MazeGame:
     def __init__(self, config=None):
@@ -20,20 +22,61 @@ class MazeGame:
         # Multiple Keys Support
         self.all_key_positions = [] 
         self.collected_keys = []
+        self._key_plan = None
+        self._distance_fields = None
+        self.maze_version = 0 # Bumped whenever the maze changes (renderers cache by it)
         
-        self.enemies = []
+        self._enemies = []
+        self.swarm = None
         self.goal_discovered = False
+        self._path_oracle = None
+
+        # Pre-generated corpus (see maze_corpus.py): generate_maze then loads
+        # the next maze of a seeded order instead of carving a new one
+        self.corpus = None
+        corpus_path = self.config.get("corpus", MAZE_CORPUS)
+        if corpus_path:
+            self.corpus = MazeCorpus(corpus_path)
+            # The corpus fixes maze size and key/trap/enemy counts; say so
+            # when that overrides what the caller asked for
+            ignored = [f"{k}={self.config[k]} (corpus has {v})" for k, v in self.corpus.config.items()
+                       if k in self.config and self.config[k] != v]
+            if ignored: print(f"Warning: {corpus_path} ignores {', '.join(ignored)}")
+            self.corpus_order = self.corpus.order(self.config.get("corpus_seed", CORPUS_SEED))
+            self.corpus_cursor = 0
         
         self.generate_maze()
 
+    @property
+    def maze_config(self):
+        # Size and counts the mazes are actually built with
+        return self.corpus.config if self.corpus is not None else self.config
+
     @property
     def key_pos(self):
-        uncollected = [k for k in self.all_key_positions if k not in self.collected_keys]
-        if not uncollected:
-            return (-1, -1)
-        if self.agent_pos:
-            return min(uncollected, key=lambda k: manhattan_distance(self.agent_pos, k))
-        return uncollected[0]
+        # Next key of the precomputed visiting order
+        for k in self.key_plan:
+            if k not in self.collected_keys:
+                return k
+        return (-1, -1)
+
+    @property
+    def enemies(self):
+        # The swarm owns the live enemy state; Enemy objects are synced on demand
+        if self.swarm is not None: self.swarm.sync(self._enemies)
+        return self._enemies
+
+    @enemies.setter
+    def enemies(self, enemies):
+        self._enemies = list(enemies)
+        self.swarm = EnemySwarm(self.grid, self._enemies)
+
+    @property
+    def path_oracle(self):
+        # Built on first use, once per maze
+        if self._path_oracle is None or self._path_oracle.grid is not self.grid:
+            self._path_oracle = TreePathOracle(self.grid)
+        return self._path_oracle
 
     @property
     def has_key(self):
@@ -44,71 +87,178 @@ class MazeGame:
         pass
 
     def generate_maze(self):
-        while True:
-            self.grid = np.full((GRID_HEIGHT, GRID_WIDTH), WALL, dtype=int)
-            self._recursive_backtracking(1, 1, self.grid)
+        if self.corpus is not None:
+            self.load_maze(self.corpus_order[self.corpus_cursor % len(self.corpus)])
+            self.corpus_cursor += 1
+            return
 
-            path_cells = [(r, c) for r in range(1, GRID_HEIGHT - 1) for c in range(1, GRID_WIDTH - 1) if self.grid[r,c] == EMPTY]
-            if len(path_cells) < 50: continue
-
-            # Zoning
-            left_zone = [p for p in path_cells if p[1] < GRID_WIDTH // 4]
-            right_zone = [p for p in path_cells if p[1] > (GRID_WIDTH * 3) // 4]
-            mid_zone = [p for p in path_cells if GRID_WIDTH // 4 <= p[1] <= (GRID_WIDTH * 3) // 4]
+        height = self.config.get("height", GRID_HEIGHT)
+        width = self.config.get("width", GRID_WIDTH)
+        while True:
+            self.grid = self._carve_maze(height, width)
 
-            if not left_zone or not right_zone or not mid_zone: continue
+            # Zoning (cells are sampled by rejection instead of listing every
+            # path cell, so huge grids never materialise per-cell lists)
+            interior = self.grid[1:-1, 1:-1] == EMPTY
+            left_cols = (1, width // 4 - 1)
+            right_cols = ((width * 3) // 4 + 1, width - 2)
+            mid_cols = (width // 4, (width * 3) // 4)
+            num_open = int(np.count_nonzero(interior))
+            if num_open < 50: continue
+            mid_open = self._count_open(interior, mid_cols)
+            if not self._count_open(interior, left_cols) or not self._count_open(interior, right_cols) or not mid_open: continue
 
-            self.start_pos = random.choice(left_zone)
-            self.goal_pos = random.choice(right_zone)
+            self.start_pos = self._sample_cell(left_cols)
+            self.goal_pos = self._sample_cell(right_cols)
             
             # 1. Keys
             self.all_key_positions = []
             self.collected_keys = []
             num_keys = self.config.get("keys", 1)
+            placements = {self.start_pos, self.goal_pos}
             
-            if len(mid_zone) >= num_keys:
-                self.all_key_positions = random.sample(mid_zone, num_keys)
+            if mid_open >= num_keys:
+                for _ in range(num_keys):
+                    k_pos = self._sample_cell(mid_cols, placements)
+                    self.all_key_positions.append(k_pos)
+                    placements.add(k_pos)
             else: continue 
 
-            # 2. Traps
-            placements = {self.start_pos, self.goal_pos} | set(self.all_key_positions)
-            trap_candidates = [p for p in path_cells if p not in placements]
-            num_traps = self.config.get("traps", 5)
-            
-            if len(trap_candidates) >= num_traps:
-                trap_positions = random.sample(trap_candidates, k=num_traps)
-                for pos in trap_positions: self.grid[pos] = TRAP
-
-            # 3. Enemies
-            self.enemies = []
-            safe_cells = [p for p in path_cells if p not in placements and self.grid[p] != TRAP]
-            num_enemies = self.config.get("enemies", 3)
-            
-            if len(safe_cells) >= num_enemies:
-                 for _ in range(num_enemies):
-                    self.enemies.append(Enemy(self.grid, safe_cells))
-
-            # Validation
-            if not a_star_path(self.grid, self.start_pos, self.goal_pos): continue
-            keys_reachable = True
-            for k_pos in self.all_key_positions:
-                if not a_star_path(self.grid, self.start_pos, k_pos):
-                    keys_reachable = False
-                    break
-            if keys_reachable: break
+            # 2. Validation: one flood fill from the start. The traced routes to
+            # the goal and keys are kept trap-free, so traps can never
+            # disconnect them and no second check is needed.
+            came = flood_fill(self.grid, self.start_pos)
+            protected = bytearray(len(came))
+            num_protected = 0
+            for target in [self.goal_pos] + self.all_key_positions:
+                marked = mark_route(came, width, target, protected)
+                if marked < 0: break
+                num_protected += marked
+            else:
+                break
+        
+        # 3. Traps (never on a protected route)
+        num_traps = self.config.get("traps", 5)
+        
+        if num_open - num_protected >= num_traps:
+            for _ in range(num_traps):
+                while True:
+                    pos = self._sample_cell((1, width - 2))
+                    if not protected[pos[0] * width + pos[1]]: break
+                self.grid[pos] = TRAP
+
+        # 4. Enemies (only once the maze is final)
+        enemies = []
+        num_enemies = self.config.get("enemies", 3)
+        num_safe = int(np.count_nonzero(self.grid[1:-1, 1:-1] == EMPTY)) - len(placements)
         
+        if num_safe >= num_enemies:
+             for _ in range(num_enemies):
+                enemies.append(Enemy(self.grid, [self._sample_cell((1, width - 2), placements)]))
+        self.enemies = enemies
+        
+        self._key_plan = None
+        self._distance_fields = None
+        self.maze_version += 1
         self.reset()
 
-    def _recursive_backtracking(self, r, c, grid):
-        grid_height, grid_width = grid.shape
-        grid[r, c] = EMPTY
-        neighbors = [(r-2, c), (r+2, c), (r, c-2), (r, c+2)]
-        random.shuffle(neighbors)
-        for nr, nc in neighbors:
-            if 0 < nr < grid_height - 1 and 0 < nc < grid_width - 1 and grid[nr, nc] == WALL:
-                wall_r, wall_c = (r + nr) // 2, (c + nc) // 2
-                grid[wall_r, wall_c] = EMPTY
-                self._recursive_backtracking(nr, nc, grid)
+    def load_maze(self, index):
+        # Maze `index` of the corpus; the grid is a copy-on-write memmap view
+        corpus = self.corpus
+        self.grid = corpus.grids[index]
+        self.start_pos = tuple(corpus.starts[index].tolist())
+        self.goal_pos = tuple(corpus.goals[index].tolist())
+        self.all_key_positions = [tuple(k) for k in corpus.keys[index].tolist()]
+        self.collected_keys = []
+
+        enemies = []
+        for pos, d in zip(corpus.enemies[index].tolist(), corpus.enemy_dirs[index].tolist()):
+            if pos[0] < 0: continue # Padding
+            enemy = Enemy(self.grid, [tuple(pos)])
+            enemy.current_dir = tuple(d)
+            enemies.append(enemy)
+        self.enemies = enemies
+
+        self._key_plan = None
+        self._distance_fields = None
+        self.maze_version += 1
+        self.reset()
+
+    @staticmethod
+    def _count_open(interior, cols):
+        # interior is grid[1:-1, 1:-1], so column c lives at c - 1
+        return int(np.count_nonzero(interior[:, cols[0] - 1:cols[1]])) if cols[0] <= cols[1] else 0
+
+    def _sample_cell(self, cols, exclude=()):
+        # Uniform EMPTY interior cell in the column range, not in exclude.
+        # Callers check that one exists; about half of all cells are open.
+        grid_height = self.grid.shape[0]
+        while True:
+            pos = (random.randint(1, grid_height - 2), random.randint(cols[0], cols[1]))
+            if self.grid[pos] == EMPTY and pos not in exclude:
+                return pos
+
+    @property
+    def distance_fields(self):
+        # One BFS per point of interest, computed on first use per maze
+        if self._distance_fields is None:
+            points = [self.start_pos] + self.all_key_positions + [self.goal_pos]
+            self._distance_fields = {p: bfs_distances(self.grid, p) for p in points}
+        return self._distance_fields
+
+    @property
+    def key_plan(self):
+        # Exact key visiting order over the distance matrix, cached per maze
+        if self._key_plan is None:
+            points = [self.start_pos] + self.all_key_positions + [self.goal_pos]
+            dist = [[self.distance(a, b) for b in points] for a in points]
+            self._key_plan = [self.all_key_positions[i] for i in held_karp_order(dist)]
+        return self._key_plan
+
+    def distance(self, start, end):
+        # Steps from start to end (inf if unreachable): the tree oracle on
+        # perfect mazes, otherwise the distance field of whichever end is the
+        # start, a key or the goal (the oracle's A* fallback for other cells)
+        oracle = self.path_oracle
+        fields = {} if oracle.is_tree else self.distance_fields
+        if start in fields: d = int(fields[start][end])
+        elif end in fields: d = int(fields[end][start]) # Same step count either way
+        else: d = oracle.distance(start, end)
+        return float('inf') if d is None or d < 0 else d
+
+    def path_to(self, target):
+        # Perfect mazes: the oracle's unique path, no search. Otherwise a table
+        # lookup for the start/keys/goal (the oracle's A* fallback for other cells)
+        oracle = self.path_oracle
+        field = None if oracle.is_tree else self.distance_fields.get(target)
+        if field is None:
+            return oracle.path(self.agent_pos, target)
+        return path_from_field(field, self.agent_pos)
+
+    def _carve_maze(self, grid_height, grid_width):
+        # Recursive backtracking with an explicit stack of flat cell indices, so
+        # maze size is bounded by memory rather than Python's recursion limit.
+        # Carving happens in a bytearray that becomes the uint8 grid without a copy.
+        cells = bytearray([WALL]) * (grid_height * grid_width)
+        start = grid_width + 1
+        cells[start] = EMPTY
+        stack = array('i', [start])
+        while stack:
+            cell = stack[-1]
+            r, c = divmod(cell, grid_width)
+            options = []
+            if r - 2 > 0 and cells[cell - 2 * grid_width] == WALL: options.append(-grid_width)
+            if r + 2 < grid_height - 1 and cells[cell + 2 * grid_width] == WALL: options.append(grid_width)
+            if c - 2 > 0 and cells[cell - 2] == WALL: options.append(-1)
+            if c + 2 < grid_width - 1 and cells[cell + 2] == WALL: options.append(1)
+            if not options:
+                stack.pop()
+                continue
+            step = random.choice(options)
+            cells[cell + step] = EMPTY
+            cells[cell + 2 * step] = EMPTY
+            stack.append(cell + 2 * step)
+        return np.frombuffer(cells, dtype=np.uint8).reshape(grid_height, grid_width)
 
     def reset(self):
         self.agent_pos = self.start_pos
@@ -118,52 +268,3 @@ class MazeGame:
 
     def get_state(self):
         return int(self.has_key) * 2 + int(self.goal_discovered)
-
-# --- IMPORTANT: THIS FUNCTION MUST BE OUTSIDE THE CLASS ---
-# (Ensure there are NO spaces/tabs before 'def')
-def draw_game_state(screen, game, assets, path=None):
-    wall_texture, trap_img, key_img, goal_img = assets
-    
-    # Draw Grid
-    for r in range(GRID_HEIGHT):
-        for c in range(GRID_WIDTH):
-            rect = pygame.Rect(c*CELL_SIZE, r*CELL_SIZE, CELL_SIZE, CELL_SIZE)
-            element = game.grid[r, c]
-            if element == WALL:
-                if wall_texture: screen.blit(wall_texture, rect)
-                else: pygame.draw.rect(screen, BLACK, rect)
-            else:
-                pygame.draw.rect(screen, WHITE, rect)
-                if element == TRAP:
-                    if trap_img: screen.blit(trap_img, rect)
-                    else: pygame.draw.rect(screen, RED, rect)
-
-    # Draw Start
-    pygame.draw.rect(screen, GRAY, (game.start_pos[1]*CELL_SIZE, game.start_pos[0]*CELL_SIZE, CELL_SIZE, CELL_SIZE))
-    
-    # Draw Keys
-    for k_pos in game.all_key_positions:
-        if k_pos not in game.collected_keys:
-            k_rect = pygame.Rect(k_pos[1]*CELL_SIZE, k_pos[0]*CELL_SIZE, CELL_SIZE, CELL_SIZE)
-            if key_img: screen.blit(key_img, k_rect)
-            else: pygame.draw.rect(screen, YELLOW, k_rect)
-
-    # Draw Goal
-    g_rect = pygame.Rect(game.goal_pos[1]*CELL_SIZE, game.goal_pos[0]*CELL_SIZE, CELL_SIZE, CELL_SIZE)
-    if goal_img: screen.blit(goal_img, g_rect)
-    else: pygame.draw.rect(screen, GREEN, g_rect)
-
-    # Draw Path
-    if path:
-        for pos in path:
-            pygame.draw.circle(screen, PATH_COLOR, (pos[1]*CELL_SIZE + CELL_SIZE//2, pos[0]*CELL_SIZE + CELL_SIZE//2), 2)
-
-    # Draw Enemies
-    for enemy in game.enemies:
-        center = (enemy.pos[1]*CELL_SIZE + CELL_SIZE//2, enemy.pos[0]*CELL_SIZE + CELL_SIZE//2)
-        pygame.draw.circle(screen, PURPLE, center, CELL_SIZE//2 - 2)
-
-    # Draw Agent
-    center_x = game.agent_pos[1] * CELL_SIZE + CELL_SIZE // 2
-    center_y = game.agent_pos[0] * CELL_SIZE + CELL_SIZE // 2
-    pygame.draw.circle(screen, BLUE, (center_x, center_y), CELL_SIZE // 2 - 2)
\ No newline at end of file
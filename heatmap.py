@@ -0,0 +1,89 @@
+# heatmap.py
+# Death / visit heatmaps accumulated as compact integer counters.
+#
+# Visits arrive as whole episode trajectories, folded in with one add.at each.
+# With a path, flush() adds everything recorded since the last flush to a
+# shared .npy file (memory-mapped, updated under a file lock), so many runs and
+# processes aggregate into one map:
+#
+#   python main_app.py --headless --runs 100000 --heatmap risk.npy
+import os
+import numpy as np
+from config import *
+
+try:
+    import fcntl
+except ImportError: # Windows: no advisory locks, flushes are not serialized
+    fcntl = None
+
+DEATHS, VISITS = 0, 1
+
+class _FileLock:
+    def __init__(self, path):
+        self.path = path + ".lock"
+
+    def __enter__(self):
+        self.f = open(self.path, "a")
+        if fcntl: fcntl.flock(self.f, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc):
+        if fcntl: fcntl.flock(self.f, fcntl.LOCK_UN)
+        self.f.close()
+
+class HeatmapAccumulator:
+    """Per-cell death and visit counts (uint32, shape (2, height, width))."""
+    def __init__(self, grid_height, grid_width, path=None):
+        self.height, self.width = grid_height, grid_width
+        self.counts = np.zeros((2, grid_height, grid_width), dtype=np.uint32)
+        self.path = path
+        self._flushed = np.zeros_like(self.counts) if path else None
+
+    # --- Recording ---
+    def record_death(self, pos):
+        self.counts[DEATHS][pos] += 1
+
+    def record_trajectory(self, positions, layer=VISITS):
+        # Batched update from a whole path: (N, 2) array or list of (r, c)
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1, 2)
+        np.add.at(self.counts[layer].reshape(-1), positions[:, 0] * self.width + positions[:, 1], 1)
+
+    # --- Persistence ---
+    def _open_shared(self):
+        shape = self.counts.shape
+        if os.path.exists(self.path):
+            shared = np.lib.format.open_memmap(self.path, mode="r+")
+            if shared.shape != shape or shared.dtype != self.counts.dtype:
+                raise ValueError(f"{self.path} holds a {shared.shape} {shared.dtype} heatmap, expected {shape}")
+            return shared
+        return np.lib.format.open_memmap(self.path, mode="w+", dtype=self.counts.dtype, shape=shape)
+
+    def flush(self):
+        # Adds everything recorded since the last flush to the shared file
+        if self.path is None: return
+        with _FileLock(self.path):
+            shared = self._open_shared()
+            shared += self.counts - self._flushed
+            shared.flush()
+            del shared
+        self._flushed[:] = self.counts
+
+    def totals(self):
+        # Aggregate over every flushed run (just this one without a file)
+        if self.path is None or not os.path.exists(self.path):
+            return self.counts
+        self.flush()
+        return np.array(np.load(self.path, mmap_mode="r"))
+
+    # --- Rendering ---
+    def show(self, aggregate=True):
+        # One image per map (imshow), which stays fast at 1000x1000 and beyond
+        import matplotlib.pyplot as plt
+        counts = self.totals() if aggregate else self.counts
+        print("Generating Heatmap...")
+        fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+        for ax, layer, cmap, title in [(axes[0], DEATHS, "Reds", "Agent Death Zones (Risk Analysis)"),
+                                       (axes[1], VISITS, "Blues", "Agent Traversal Patterns")]:
+            image = ax.imshow(counts[layer], cmap=cmap, interpolation="nearest")
+            fig.colorbar(image, ax=ax)
+            ax.set_title(title)
+        plt.tight_layout(); plt.show()
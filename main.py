@@ -1,15 +1,19 @@
 # main.py
-import pygame
+# pygame, the UI and matplotlib are imported only when a window or plot is
+# actually shown, so headless training shards start fast.
+import argparse
 import time
-import matplotlib.pyplot as plt
 from collections import deque
 
 from config import *
-from environment import MazeGame, draw_game_state
+from environment import MazeGame
 from agent import QLearningAgent
-from utils import a_star_path
+from profiler import profiler, add_profile_args, enable_from_args
+from spacetime import plan_around_enemies
+from streaming_maze import WindowedMazeGame
 
 def load_assets():
+    import pygame
     try:
         wall = pygame.image.load("assets/Brick_Wall.png").convert()
         wall = pygame.transform.scale(wall, (CELL_SIZE, CELL_SIZE))
@@ -23,145 +27,203 @@ def load_assets():
 
     return wall, load_icon("trap"), load_icon("key"), load_icon("goal")
 
-def draw_dashboard(screen, episode_text, epsilon, win_rate, strategy):
-    font = pygame.font.Font(None, 24)
-    pygame.draw.rect(screen, BLACK, (0, WINDOW_HEIGHT-100, WINDOW_WIDTH, 100))
-    texts = [f"Ep: {episode_text}", f"Epsilon: {epsilon:.3f}", f"Win Rate: {win_rate:.1f}%", f"Strategy: {strategy}"]
-    for i, text in enumerate(texts):
-        surf = font.render(text, True, WHITE)
-        screen.blit(surf, (10 + i * (WINDOW_WIDTH/4), WINDOW_HEIGHT - 65))
-
-def main():
-    pygame.init()
-    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-    pygame.display.set_caption("AI Maze Runner - Project Refactored")
-    clock = pygame.time.Clock()
-    
-    assets = load_assets()
-    game = MazeGame()
+def make_dashboard():
+    from ui import Dashboard
+    hud = Dashboard((0, WINDOW_HEIGHT-100, WINDOW_WIDTH, 100), font_size=24)
+    for i, name in enumerate(["episode", "epsilon", "win_rate", "strategy"]):
+        hud.add_field(name, (10 + i * (WINDOW_WIDTH/4), WINDOW_HEIGHT - 65))
+    return hud
+
+def draw_dashboard(screen, hud, episode_text, epsilon, win_rate, strategy):
+    hud.invalidate() # The frame was cleared
+    return hud.draw(screen, episode=f"Ep: {episode_text}", epsilon=f"Epsilon: {epsilon:.3f}",
+                    win_rate=f"Win Rate: {win_rate:.1f}%", strategy=f"Strategy: {strategy}")
+
+def plot_training(win_rates):
+    import matplotlib.pyplot as plt
+    plt.plot(win_rates)
+    plt.title("Training Performance")
+    plt.show()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the Q-learning agent")
+    parser.add_argument("--headless", action="store_true", help="no window and no plot, whatever config.py says")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="training state to resume from and save to")
+    parser.add_argument("--fresh", action="store_true", help="ignore any existing checkpoint")
+    parser.add_argument("--episodes", type=int, default=TOTAL_EPISODES)
+    parser.add_argument("--streaming", action="store_true", help="train on one endless streamed maze (streaming_maze.py)")
+    parser.add_argument("--timed-paths", action="store_true",
+                        help="walk space-time paths around the predicted swarm, as playback does "
+                             "(slower; vector_env/parallel_train keep the static route)")
+    add_profile_args(parser)
+    args = parser.parse_args(argv)
+    enable_from_args(args)
+    visualize = VISUALIZE_TRAINING and not args.headless
+
+    if visualize:
+        import pygame
+        from rendering import MazeRenderer
+        pygame.init()
+        screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        pygame.display.set_caption("AI Maze Runner - Project Refactored")
+        clock = pygame.time.Clock()
+        
+        renderer = MazeRenderer(load_assets())
+        hud = make_dashboard()
+    game = WindowedMazeGame() if args.streaming else MazeGame()
     agent = QLearningAgent()
     
     win_rates = []
     recent_wins = deque(maxlen=100)
 
     # --- TRAINING LOOP ---
-    if LOAD_Q_TABLE_IF_EXISTS:
-        if agent.load(): agent.epsilon = 0
-
-    print("Starting Training...")
+    start_episode = 1
+    if LOAD_Q_TABLE_IF_EXISTS and not args.fresh:
+        checkpoint = agent.load_checkpoint(args.checkpoint)
+        if checkpoint:
+            # Saved with the RNG states: a run saved on a maze change continues exactly
+            start_episode = checkpoint["episode"] + 1
+            win_rates = checkpoint["extra"]["win_rates"]
+            recent_wins.extend(checkpoint["extra"]["recent_wins"])
+        elif agent.load():
+            agent.epsilon = EPSILON_MIN # A bare table carries no epsilon; assume it finished decaying
+    last_checkpoint = start_episode - 1
+
+    def save_checkpoint(episode):
+        agent.save_checkpoint(args.checkpoint, episode,
+                              {"win_rates": win_rates, "recent_wins": list(recent_wins)})
+
+    print("Starting Training..." if start_episode == 1 else f"Resuming Training at episode {start_episode}...")
     running = True
-    for episode in range(1, TOTAL_EPISODES + 1):
-        if not running: break
+    completed = start_episode - 1
+    try:
+        for episode in range(start_episode, args.episodes + 1):
+            if not running: break
         
-        if (episode - 1) % NEW_MAZE_FREQUENCY == 0:
-            game.generate_maze()
-
-        state = game.reset()
-        done = False
-        steps = 0
-        is_win = False
+            # A run resumed mid-maze (saved on exit) starts on a new maze
+            if (episode - 1) % NEW_MAZE_FREQUENCY == 0 or episode == start_episode:
+                with profiler.phase("generate"): game.generate_maze()
+
+            state = game.reset()
+            done = False
+            steps = 0
+            is_win = False
         
-        while not done and steps < MAX_STRATEGIC_STEPS:
-            for enemy in game.enemies:
-                enemy.move(game.grid)
+            while not done and steps < MAX_STRATEGIC_STEPS:
+                with profiler.phase("enemies"): game.swarm.step()
                 
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT: running = False
+                if visualize:
+                    for event in pygame.event.get():
+                        if event.type == pygame.QUIT: running = False
             
-            action = agent.choose_action(state)
+                action = agent.choose_action(state)
             
-            # Decode Strategy for Visualization
-            if action == 0 and not game.has_key:
-                target = game.key_pos
-                strategy_name = "SEEK KEY"
-            else:
-                target = game.goal_pos
-                strategy_name = "SEEK GOAL"
-
-            # Execute Movement (A* layer)
-            path = a_star_path(game.grid, game.agent_pos, target)
-            step_count_in_path = 0
-            path_interrupted = False
+                # Decode Strategy for Visualization
+                if action == 0 and not game.has_key:
+                    target = game.key_pos
+                    strategy_name = "SEEK KEY"
+                else:
+                    target = game.goal_pos
+                    strategy_name = "SEEK GOAL"
+
+                # Execute Movement: the static route, or with --timed-paths a timed
+                # path (moves and waits) around the swarm's predicted moves
+                with profiler.phase("astar"):
+                    path = args.timed_paths and plan_around_enemies(game, target) or game.path_to(target)
+                step_count_in_path = 0
+                path_interrupted = False
             
-            # Visualization
-            if VISUALIZE_TRAINING:
-                screen.fill(GRAY)
-                draw_game_state(screen, game, assets, path)
-                draw_dashboard(screen, f"{episode}", agent.epsilon, sum(recent_wins), strategy_name)
-                pygame.display.flip()
-                # time.sleep(0.05) # Uncomment to slow down
-
-            # Calculate Reward
-            reward = 0
-            if path:
-                # SIMULATE WALKING THE PATH STEP-BY-STEP
-                for next_step in path:
-                    
-                    # 1. Move Agent
-                    game.agent_pos = next_step
-                    step_count_in_path += 1
-                    
-                    # 2. Move Enemies
-                    for enemy in game.enemies:
-                        enemy.move(game.grid)
-
-                    # 3. Check Collision
-                    enemy_positions = [e.pos for e in game.enemies]
-                    if game.agent_pos in enemy_positions:
-                        reward += ENEMY_PENALTY
-                        path_interrupted = True
-                        done = True # Game Over
-                        break # Stop moving
-
-                    # 4. Visualization (Optional: Update screen every step to see the chase)
-                    if VISUALIZE_TRAINING:
+                # Visualization
+                if visualize:
+                    with profiler.phase("render"):
                         screen.fill(GRAY)
-                        draw_game_state(screen, game, assets, path)
-                        # ... draw dashboard ...
+                        renderer.draw_game_state(screen, game, path)
+                        draw_dashboard(screen, hud, f"{episode}", agent.epsilon, sum(recent_wins), strategy_name)
                         pygame.display.flip()
-                        # time.sleep(0.02) # Tiny delay to see movement
+                    # time.sleep(0.05) # Uncomment to slow down
 
-                # END OF PATH LOOP
+                # Calculate Reward
+                reward = 0
+                if path:
+                    # SIMULATE WALKING THE PATH STEP-BY-STEP
+                    for next_step in path:
+                    
+                        # 1. Move Agent
+                        game.agent_pos = next_step
+                        step_count_in_path += 1
+                    
+                        # 2. Move Enemies
+                        with profiler.phase("enemies"): game.swarm.step()
+
+                        # 3. Check Collision
+                        with profiler.phase("collision"): hit = game.swarm.occupies(game.agent_pos)
+                        if hit:
+                            reward += ENEMY_PENALTY
+                            path_interrupted = True
+                            done = True # Game Over
+                            break # Stop moving
+
+                        # 4. Visualization (Optional: Update screen every step to see the chase)
+                        if visualize:
+                            with profiler.phase("render"):
+                                screen.fill(GRAY)
+                                renderer.draw_game_state(screen, game, path)
+                                # ... draw dashboard ...
+                                pygame.display.flip()
+                            # time.sleep(0.02) # Tiny delay to see movement
+
+                    # END OF PATH LOOP
                 
-                if not path_interrupted:
-                    reward += step_count_in_path * STEP_PENALTY
+                    if not path_interrupted:
+                        reward += step_count_in_path * STEP_PENALTY
                     
-                    # --- FIX: Update Collected Keys correctly ---
-                    if game.agent_pos in game.all_key_positions:
-                        if game.agent_pos not in game.collected_keys:
-                            game.collected_keys.append(game.agent_pos)
-                            reward += KEY_REWARD
+                        # --- FIX: Update Collected Keys correctly ---
+                        if game.agent_pos in game.all_key_positions:
+                            if game.agent_pos not in game.collected_keys:
+                                game.collected_keys.append(game.agent_pos)
+                                reward += KEY_REWARD
                     
-                    # Win condition check
-                    if game.agent_pos == game.goal_pos and game.has_key:
-                        game.goal_discovered = True
-                        reward += GOAL_REWARD
-                        is_win = True
-                        done = True
-            else:
-                reward += DEAD_END_PENALTY
-                done = True
-
-            next_state = game.get_state()
-            agent.learn(state, action, reward, next_state)
-            state = next_state
-            steps += 1
-
-        recent_wins.append(1 if is_win else 0)
-        agent.decay_epsilon()
-
-        if episode % 100 == 0:
-            current_win_rate = sum(recent_wins)
-            win_rates.append(current_win_rate)
-            print(f"Episode {episode} | Win Rate: {current_win_rate}% | Epsilon: {agent.epsilon:.2f}")
+                        # Win condition check
+                        if game.agent_pos == game.goal_pos and game.has_key:
+                            game.goal_discovered = True
+                            reward += GOAL_REWARD
+                            is_win = True
+                            done = True
+                else:
+                    reward += DEAD_END_PENALTY
+                    done = True
+
+                next_state = game.get_state()
+                with profiler.phase("q_update"): agent.learn(state, action, reward, next_state)
+                state = next_state
+                steps += 1
+
+            recent_wins.append(1 if is_win else 0)
+            agent.decay_epsilon()
+            profiler.count("episodes")
+
+            if episode % 100 == 0:
+                current_win_rate = sum(recent_wins)
+                win_rates.append(current_win_rate)
+                print(f"Episode {episode} | Win Rate: {current_win_rate}% | Epsilon: {agent.epsilon:.2f}")
+
+            completed = episode
+            if episode % NEW_MAZE_FREQUENCY == 0 and episode - last_checkpoint >= CHECKPOINT_EVERY:
+                with profiler.phase("checkpoint"): save_checkpoint(episode)
+                last_checkpoint = episode
+
+    finally:
+        # Every way out (finished, window closed, Ctrl-C) keeps the progress
+        if completed > last_checkpoint: save_checkpoint(completed)
+
+    profiler.finish()
 
     if SAVE_Q_TABLE_ON_EXIT:
         agent.save()
     
-    plt.plot(win_rates)
-    plt.title("Training Performance")
-    plt.show()
-    pygame.quit()
+    if SHOW_TRAINING_PLOT and not args.headless:
+        plot_training(win_rates)
+    if visualize: pygame.quit()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
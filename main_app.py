@@ -1,36 +1,24 @@
-import pygame
+# main_app.py
+# pygame/UI load in main() and the plotting stack only when heatmaps are
+# shown, so the headless evaluation path imports neither.
+import argparse
+import random
+import sys
 import time
+from collections import Counter
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from config import *
-from environment import MazeGame, draw_game_state
+from environment import MazeGame
 from agent import QLearningAgent
-from utils import a_star_path
-from ui import StartMenu, Button
-
-# --- HEATMAP CLASS ---
-class HeatmapVisualizer:
-    def __init__(self, grid_height, grid_width):
-        self.height = grid_height; self.width = grid_width
-        self.death_map = np.zeros((grid_height, grid_width))
-        self.visit_map = np.zeros((grid_height, grid_width))
-
-    def record_death(self, pos): self.death_map[pos] += 1
-    def record_visit(self, pos): self.visit_map[pos] += 1
-    def show_heatmap(self):
-        print("Generating Heatmap...")
-        plt.figure(figsize=(12, 5))
-        plt.subplot(1, 2, 1)
-        sns.heatmap(self.death_map, cmap="Reds", cbar=True, linewidths=0.1, linecolor='gray')
-        plt.title("Agent Death Zones (Risk Analysis)")
-        plt.subplot(1, 2, 2)
-        sns.heatmap(self.visit_map, cmap="Blues", cbar=True, linewidths=0.1, linecolor='gray')
-        plt.title("Agent Traversal Patterns")
-        plt.tight_layout(); plt.show()
+from profiler import profiler, add_profile_args, enable_from_args
+from heatmap import HeatmapAccumulator
+from spacetime import plan_around_enemies
+from dstar_lite import IncrementalPlanner
+from streaming_maze import WindowedMazeGame
 
 # --- ASSET LOADER ---
 def load_assets():
+    import pygame
     try:
         wall = pygame.image.load("assets/Brick_Wall.png").convert()
         wall = pygame.transform.scale(wall, (CELL_SIZE, CELL_SIZE))
@@ -42,13 +30,230 @@ def load_assets():
         except: return None
     return wall, load_icon("trap"), load_icon("key"), load_icon("goal")
 
-def is_safe(target_pos, enemies):
-    for enemy in enemies:
-        if abs(target_pos[0] - enemy.pos[0]) + abs(target_pos[1] - enemy.pos[1]) <= 2:
-            return False
-    return True
+def is_safe(target_pos, swarm):
+    # O(1) lookup in the swarm's danger-radius mask
+    return swarm.is_safe(target_pos)
 
-def main():
+def sim_tick_interval(speed):
+    # "Game Speed" 1..9 doubles the tick rate per step; SIM_UNCAPPED_SPEED runs flat out (0)
+    if speed >= SIM_UNCAPPED_SPEED: return 0.0
+    return 1.0 / (SIM_BASE_RATE * 2 ** (speed - 1))
+
+# --- SIMULATION ---
+class EvaluationSession:
+    """The evaluation rules as a tick-driven state machine.
+
+    One tick() is one agent step (or a wait) followed by one enemy step and
+    the collision check; strategic replanning happens at the start of the
+    tick that needs it. Plans are timed paths around the swarm's predicted
+    moves, renewed every SPACETIME_HORIZON ticks; when every timed route
+    collides, a D* Lite route around the enemies' current cells is repaired
+    each tick instead. Rendering is not involved, so callers decide how many
+    ticks to run per frame.
+    """
+    def __init__(self, game, agent, total_runs, analyzer=None, max_ticks=None, verbose=True):
+        self.game = game
+        self.agent = agent
+        self.total_runs = total_runs
+        self.analyzer = analyzer
+        self.max_ticks = max_ticks # Per episode; None = no limit
+        self.verbose = verbose
+        self.planner = IncrementalPlanner() # Keeps its search state between ticks
+        self.episode = 0
+        self.wins = 0
+        self.losses = 0
+        self.loss_causes = Counter()
+        self.win_ticks = []        # Ticks taken by each won episode
+        self.total_ticks = 0
+        self.total_waits = 0
+        self.finished = False
+        self._start_episode()
+
+    def _start_episode(self):
+        self.episode += 1
+        self.path = None
+        self.target = None
+        self.timed = False         # path is a space-time plan (waits included)
+        self.step_idx = 0
+        self.ticks = 0
+        self.waiting = False
+        self.strategy = ""
+        self.trajectory = []       # Cells visited this episode (heatmap)
+        if self.episode > self.total_runs:
+            self.finished = True
+            return
+        with profiler.phase("generate"): self.game.generate_maze()
+        self.state = self.game.reset()
+
+    def _end_episode(self, won, message, cause=None):
+        if self.verbose: print(message)
+        profiler.count("episodes")
+        if self.analyzer and self.trajectory: self.analyzer.record_trajectory(self.trajectory)
+        if won:
+            self.wins += 1
+            self.win_ticks.append(self.ticks)
+        else:
+            self.losses += 1
+            self.loss_causes[cause] += 1
+        self._start_episode()
+
+    def _plan(self):
+        game = self.game
+        self.agent.choose_action(self.state)
+        if not game.has_key:
+            target = game.key_pos
+            self.strategy = f"Target: KEY ({len(game.collected_keys)}/{len(game.all_key_positions)})"
+        else:
+            target = game.goal_pos
+            self.strategy = "Target: GOAL"
+        self.target = target
+        with profiler.phase("astar"):
+            self.path = plan_around_enemies(game, target)
+            self.timed = self.path is not None
+            if not self.timed and game.distance(game.agent_pos, target) < float('inf'):
+                self.path = self._dodge_route()
+        self.step_idx = 0
+
+    def _dodge_route(self):
+        # Cornered: route around the cells enemies occupy now. The planner is
+        # fed the new cells every tick and repairs its search instead of
+        # starting over; no route yet means wait where we are.
+        game = self.game
+        path = self.planner.plan(game.grid, game.agent_pos, self.target, game.swarm.positions())
+        return path or [game.agent_pos]
+
+    def tick(self):
+        if self.finished: return
+        game = self.game
+        if self.path is None:
+            self._plan()
+            if not self.path:
+                self._end_episode(False, "Loss: No path.", "no_path")
+                return
+        self.ticks += 1
+        self.total_ticks += 1
+        profiler.count("ticks")
+
+        # Movement: timed paths schedule their own waits, a dodge route
+        # waits whenever its next cell is near an enemy
+        next_step = self.path[self.step_idx]
+        if self.timed:
+            self.waiting = next_step == game.agent_pos
+            self.step_idx += 1
+        else:
+            self.waiting = next_step == game.agent_pos or not is_safe(next_step, game.swarm)
+            if not self.waiting: self.step_idx += 1
+        old_agent_pos = game.agent_pos
+        if not self.waiting:
+            game.agent_pos = next_step
+            self.trajectory.append(next_step)
+            if game.agent_pos in game.all_key_positions and game.agent_pos not in game.collected_keys:
+                game.collected_keys.append(game.agent_pos)
+        else:
+            self.total_waits += 1
+
+        # Enemy Update
+        with profiler.phase("enemies"): game.swarm.step()
+
+        # Check Collision
+        with profiler.phase("collision"):
+            collision = game.swarm.occupies(game.agent_pos)
+            if not self.waiting and game.swarm.swapped(old_agent_pos, game.agent_pos): collision = True
+        if collision:
+            if self.analyzer: self.analyzer.record_death(game.agent_pos) # Analytics
+            self._end_episode(False, "Loss: Died to enemy.", "enemy")
+            return
+
+        # Path finished: win, or replan on the next tick
+        if self.step_idx == len(self.path):
+            if game.has_key and game.agent_pos == game.goal_pos:
+                self._end_episode(True, "WIN!")
+                return
+            self.state = game.get_state()
+            self.path = None
+        elif self.timed:
+            if self.step_idx >= SPACETIME_HORIZON: self.path = None # Prediction window used up: replan
+        else:
+            with profiler.phase("astar"): self.path = self._dodge_route() # Enemies moved: repair
+            self.step_idx = 0
+
+        if self.max_ticks and self.ticks >= self.max_ticks:
+            self._end_episode(False, "Loss: Out of time.", "timeout")
+
+# --- HEADLESS EVALUATION ---
+def evaluate_headless(game_config, runs, seed=None, max_ticks=EVAL_MAX_TICKS, heatmap_path=None, streaming=False):
+    """Runs `runs` episodes with the windowed app's rules and no display.
+    Returns the finished EvaluationSession and the wall-clock seconds taken.
+    With heatmap_path, deaths and visits are added to that shared heatmap;
+    with streaming, the episodes run on one endless WindowedMazeGame."""
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    agent = QLearningAgent()
+    if not agent.load(): return None, 0.0
+    agent.epsilon = 0.0
+    game = WindowedMazeGame(game_config) if streaming else MazeGame(game_config)
+    analyzer = HeatmapAccumulator(*game.grid.shape, path=heatmap_path) if heatmap_path else None
+    start = time.perf_counter()
+    session = EvaluationSession(game, agent, runs, analyzer, max_ticks=max_ticks, verbose=False)
+    while not session.finished:
+        session.tick()
+    if analyzer: analyzer.flush()
+    return session, time.perf_counter() - start
+
+def report(session, elapsed):
+    runs = session.wins + session.losses
+    print(f"Runs: {runs} | Wins: {session.wins} | Win Rate: {100 * session.wins / max(runs, 1):.1f}%")
+    for cause in ("enemy", "no_path", "timeout"):
+        print(f"  Loss ({cause}): {session.loss_causes[cause]}")
+    if session.win_ticks:
+        print(f"Steps per win: mean {np.mean(session.win_ticks):.1f} | median {np.median(session.win_ticks):.0f}")
+    print(f"Ticks: {session.total_ticks} ({session.total_waits} waits)")
+    print(f"{elapsed:.2f}s | {runs / elapsed:.0f} runs/sec | {session.total_ticks / elapsed:.0f} ticks/sec")
+
+def headless_main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate the trained Q-table without a display")
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--enemies", type=int, default=3)
+    parser.add_argument("--keys", type=int, default=1)
+    parser.add_argument("--traps", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-ticks", type=int, default=EVAL_MAX_TICKS, help="per episode, counted as a loss")
+    parser.add_argument("--min-win-rate", type=float, default=None,
+                        help="exit with status 1 if the win rate (%%) is below this")
+    parser.add_argument("--heatmap", metavar="FILE", default=None,
+                        help="aggregate deaths/visits into this shared .npy heatmap")
+    parser.add_argument("--streaming", action="store_true",
+                        help="play one endless streamed maze instead of a new maze per run")
+    add_profile_args(parser)
+    args = parser.parse_args(argv)
+    enable_from_args(args)
+
+    game_config = {"enemies": args.enemies, "keys": args.keys, "traps": args.traps}
+    session, elapsed = evaluate_headless(game_config, args.runs, args.seed, args.max_ticks, args.heatmap, args.streaming)
+    if session is None:
+        print("Please train first!")
+        return 2
+    report(session, elapsed)
+    if args.heatmap: print(f"Heatmap counts added to {args.heatmap}")
+    profiler.finish()
+    if args.min_win_rate is not None and 100 * session.wins / args.runs < args.min_win_rate:
+        print(f"FAIL: win rate below {args.min_win_rate}%")
+        return 1
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch the trained agent play")
+    parser.add_argument("--heatmap", metavar="FILE", default=None,
+                        help="also add this session's heatmap to a shared .npy and show the merged map")
+    add_profile_args(parser)
+    args = parser.parse_args(argv)
+    enable_from_args(args)
+
+    import pygame
+    from rendering import MazeRenderer
+    from ui import StartMenu, Button, Dashboard, TextCache
     pygame.init()
     screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
     pygame.display.set_caption("Maze Runner Ultimate")
@@ -62,154 +267,96 @@ def main():
     # Config extraction
     TOTAL_RUNS = game_config['runs']
     SHOW_HEATMAPS = game_config['heatmaps']
-    SPEED_MODIFIER = 0.2 - (game_config['speed'] * 0.015)
-    if SPEED_MODIFIER < 0: SPEED_MODIFIER = 0
+    tick_interval = sim_tick_interval(game_config['speed'])
     
     assets = load_assets()
+    renderer = MazeRenderer(assets)
     game = MazeGame(game_config)
     agent = QLearningAgent()
     if not agent.load(): print("Please train first!"); return
     agent.epsilon = 0.0
     
     # --- ANALYTICS & STATS ---
-    analyzer = HeatmapVisualizer(GRID_HEIGHT, GRID_WIDTH) if SHOW_HEATMAPS else None
-    wins = 0
-    losses = 0
+    analyzer = HeatmapAccumulator(*game.grid.shape, path=args.heatmap) if SHOW_HEATMAPS else None
+    session = EvaluationSession(game, agent, TOTAL_RUNS, analyzer)
     
     pause_btn = Button(WINDOW_WIDTH - 120, WINDOW_HEIGHT - 80, 100, 40, "PAUSE")
     is_paused = False
 
-    for episode in range(1, TOTAL_RUNS + 1):
-        game.generate_maze()
-        state = game.reset()
-        done = False
-        
-        while not done:
-            # Event Handling
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT: return
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                     if pause_btn.rect.collidepoint(event.pos):
-                         is_paused = not is_paused
-                         pause_btn.text = "PLAY" if is_paused else "PAUSE"
-
-            if is_paused:
-                font = pygame.font.Font(None, 64)
-                txt = font.render("PAUSED", True, YELLOW)
-                screen.blit(txt, (WINDOW_WIDTH//2 - 100, WINDOW_HEIGHT//2))
-                pause_btn.draw(screen, pygame.font.Font(None, 24))
-                pygame.display.flip(); clock.tick(10); continue 
-
-            # Agent Logic
-            action = agent.choose_action(state)
-            if not game.has_key:
-                target = game.key_pos
-                strategy = f"Target: KEY ({len(game.collected_keys)}/{len(game.all_key_positions)})"
-            else:
-                target = game.goal_pos
-                strategy = "Target: GOAL"
-
-            path = a_star_path(game.grid, game.agent_pos, target)
+    # --- HUD (fonts loaded once, fields repainted only when they change) ---
+    hud = Dashboard((0, WINDOW_HEIGHT-100, WINDOW_WIDTH, 100))
+    hud.add_field("run", (20, WINDOW_HEIGHT - 85))
+    hud.add_field("strategy", (20, WINDOW_HEIGHT - 60))
+    hud.add_field("wins", (300, WINDOW_HEIGHT - 85), GREEN)
+    hud.add_field("losses", (300, WINDOW_HEIGHT - 60), RED)
+    hud.add_field("keys", (500, WINDOW_HEIGHT - 85), YELLOW)
+    hud.add_button(pause_btn)
+    overlay_text = TextCache(64)
+
+    # --- GAME LOOP: fixed-rate sim ticks, rendering capped at FPS ---
+    accumulator = 0.0
+    last_time = time.perf_counter()
+    while not session.finished:
+        # Event Handling
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT: return
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                 if pause_btn.rect.collidepoint(event.pos):
+                     is_paused = not is_paused
+                     pause_btn.text = "PLAY" if is_paused else "PAUSE"
+
+        now = time.perf_counter()
+        elapsed, last_time = now - last_time, now
+
+        if is_paused:
+            accumulator = 0.0
+            screen.blit(overlay_text.render("PAUSED", YELLOW), (WINDOW_WIDTH//2 - 100, WINDOW_HEIGHT//2))
+            hud.draw(screen); renderer.invalidate()
+            pygame.display.flip()
+            with profiler.phase("sleep"): clock.tick(10)
+            continue
+
+        # Simulation
+        if tick_interval:
+            # Clamped so a stall (window drag, slow frame) can't snowball
+            accumulator = min(accumulator + elapsed, MAX_SIM_LAG)
+            while accumulator >= tick_interval and not session.finished:
+                session.tick()
+                accumulator -= tick_interval
+        else:
+            # Uncapped: tick until this frame's time budget is spent
+            deadline = now + 1.0 / FPS
+            while time.perf_counter() < deadline and not session.finished:
+                session.tick()
+        if session.finished: break
+
+        with profiler.phase("render"):
+            # Drawing (only the changed areas reach the display)
+            dirty = renderer.draw(screen, game, session.path)
+            
+            # UI / Dashboard
+            if renderer.full_redraw: hud.invalidate()
+            dirty += hud.draw(screen,
+                run=f"Run: {session.episode}/{TOTAL_RUNS}", strategy=session.strategy,  # Column 1: Run Info
+                wins=f"WINS: {session.wins}", losses=f"LOSSES: {session.losses}",       # Column 2: Stats
+                keys=f"Keys Found: {len(game.collected_keys)}")                         # Column 3: Keys
             
-            if path:
-                path_blocked = False
-                step_idx = 0
-                
-                while step_idx < len(path):
-                    for event in pygame.event.get():
-                        if event.type == pygame.QUIT: return
-                        if event.type == pygame.MOUSEBUTTONDOWN:
-                             if pause_btn.rect.collidepoint(event.pos):
-                                 is_paused = not is_paused
-                                 pause_btn.text = "PLAY" if is_paused else "PAUSE"
-                    
-                    if is_paused:
-                        font = pygame.font.Font(None, 64); txt = font.render("PAUSED", True, YELLOW)
-                        screen.blit(txt, (WINDOW_WIDTH//2 - 100, WINDOW_HEIGHT//2))
-                        pause_btn.draw(screen, pygame.font.Font(None, 24)); pygame.display.flip(); time.sleep(0.1); continue
-
-                    # Movement
-                    next_step = path[step_idx]
-                    should_wait = False
-                    if not is_safe(next_step, game.enemies): should_wait = True
-                    old_agent_pos = game.agent_pos
-                    
-                    if not should_wait:
-                        game.agent_pos = next_step
-                        if analyzer: analyzer.record_visit(game.agent_pos) # Analytics
-                        
-                        if game.agent_pos in game.all_key_positions and game.agent_pos not in game.collected_keys:
-                            game.collected_keys.append(game.agent_pos)
-                        step_idx += 1
-                    
-                    # Enemy Update
-                    for enemy in game.enemies:
-                        old_enemy = enemy.pos
-                        enemy.move(game.grid)
-                        
-                        # Check Collision
-                        collision = False
-                        if enemy.pos == game.agent_pos: collision = True
-                        if not should_wait and game.agent_pos == old_enemy and enemy.pos == old_agent_pos: collision = True
-                        
-                        if collision:
-                            path_blocked = True
-                            if analyzer: analyzer.record_death(game.agent_pos) # Analytics
-                    
-                    if path_blocked: done = True; break
-                    
-                    # Drawing
-                    screen.fill(GRAY)
-                    draw_game_state(screen, game, assets, path)
-                    
-                    # UI / Dashboard
-                    pygame.draw.rect(screen, BLACK, (0, WINDOW_HEIGHT-100, WINDOW_WIDTH, 100))
-                    font = pygame.font.Font(None, 28)
-                    
-                    # Column 1: Run Info
-                    screen.blit(font.render(f"Run: {episode}/{TOTAL_RUNS}", True, WHITE), (20, WINDOW_HEIGHT - 85))
-                    screen.blit(font.render(strategy, True, WHITE), (20, WINDOW_HEIGHT - 60))
-                    
-                    # Column 2: Stats (Wins/Losses)
-                    screen.blit(font.render(f"WINS: {wins}", True, GREEN), (300, WINDOW_HEIGHT - 85))
-                    screen.blit(font.render(f"LOSSES: {losses}", True, RED), (300, WINDOW_HEIGHT - 60))
-                    
-                    # Column 3: Keys
-                    screen.blit(font.render(f"Keys Found: {len(game.collected_keys)}", True, YELLOW), (500, WINDOW_HEIGHT - 85))
-
-                    pause_btn.draw(screen, pygame.font.Font(None, 24))
-                    
-                    if should_wait:
-                        pygame.draw.circle(screen, (255, 165, 0), 
-                            (game.agent_pos[1]*CELL_SIZE+10, game.agent_pos[0]*CELL_SIZE+10), 20, 2)
-
-                    pygame.display.flip()
-                    time.sleep(SPEED_MODIFIER if not should_wait else 0.2)
-                
-                if not path_blocked:
-                    if game.has_key and game.agent_pos == game.goal_pos:
-                        print("WIN!")
-                        wins += 1
-                        done = True
-                    elif path_blocked: # Should have been caught above, but double check
-                        losses += 1
-                        done = True
-                else:
-                    print("Loss: Died to enemy.")
-                    losses += 1
-                    done = True
-            else:
-                print("Loss: No path.")
-                losses += 1
-                done = True
-                
-            state = game.get_state()
+            if session.waiting:
+                ring = pygame.draw.circle(screen, (255, 165, 0), 
+                    (game.agent_pos[1]*CELL_SIZE+10, game.agent_pos[0]*CELL_SIZE+10), 20, 2)
+                renderer.mark(ring); dirty.append(ring)
+
+            pygame.display.update(dirty)
+        with profiler.phase("sleep"): clock.tick(FPS)
 
     pygame.quit()
+    profiler.finish()
     
     # Show Heatmaps if enabled
     if analyzer and SHOW_HEATMAPS:
-        analyzer.show_heatmap()
+        analyzer.flush()
+        analyzer.show()
 
 if __name__ == "__main__":
+    if "--headless" in sys.argv[1:]: sys.exit(headless_main())
     main()
\ No newline at end of file
@@ -0,0 +1,119 @@
+# maze_corpus.py
+# Pre-generated maze sets. build_corpus() writes N mazes into one packed file:
+# a small JSON header followed by fixed-shape sections (grids, start/goal,
+# keys, traps, enemy spawns). MazeCorpus memory-maps those sections, so
+# loading maze i costs nothing and every machine sees byte-identical mazes.
+#
+#   python maze_corpus.py mazes.corpus --count 10000 --seed 0
+import argparse
+import json
+import random
+import struct
+import numpy as np
+from config import *
+
+MAGIC = b"MAZECRP1"
+ALIGN = 64
+
+def _layout(count, height, width, num_keys, num_traps, num_enemies):
+    # (name, dtype, shape) of every section, in file order
+    return [
+        ("grids", "uint8", (count, height, width)),
+        ("starts", "int32", (count, 2)),
+        ("goals", "int32", (count, 2)),
+        ("keys", "int32", (count, num_keys, 2)),
+        ("traps", "int32", (count, num_traps, 2)),           # -1 padded
+        ("enemies", "int32", (count, num_enemies, 2)),       # -1 padded
+        ("enemy_dirs", "int8", (count, num_enemies, 2)),
+    ]
+
+def _map(path, section, mode):
+    shape = tuple(section["shape"])
+    if not np.prod(shape): # mmap cannot map empty sections (e.g. no traps)
+        return np.zeros(shape, dtype=section["dtype"])
+    return np.memmap(path, dtype=section["dtype"], mode=mode, offset=section["offset"], shape=shape)
+
+def build_corpus(path, count, config=None, seed=0):
+    # Imported here: environment itself imports this module
+    from environment import MazeGame
+
+    config = dict(config) if config else {"enemies": 3, "keys": 1, "traps": 5}
+    config.pop("corpus", None)
+    height = config.setdefault("height", GRID_HEIGHT)
+    width = config.setdefault("width", GRID_WIDTH)
+    num_keys, num_traps, num_enemies = config.get("keys", 1), config.get("traps", 5), config.get("enemies", 3)
+
+    sections, offset = {}, 4096
+    for name, dtype, shape in _layout(count, height, width, num_keys, num_traps, num_enemies):
+        sections[name] = {"offset": offset, "dtype": dtype, "shape": list(shape)}
+        offset += -(-int(np.prod(shape)) * np.dtype(dtype).itemsize // ALIGN) * ALIGN
+    header = json.dumps({"count": count, "config": config, "seed": seed, "sections": sections}).encode()
+    if len(header) + 12 > 4096: raise ValueError("corpus header too large")
+
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        f.truncate(offset)
+    arrays = {name: _map(path, s, "r+") for name, s in sections.items()}
+
+    random.seed(seed)
+    game = MazeGame(config)
+    for i in range(count):
+        if i: game.generate_maze()
+        arrays["grids"][i] = game.grid
+        arrays["starts"][i] = game.start_pos
+        arrays["goals"][i] = game.goal_pos
+        arrays["keys"][i] = game.all_key_positions
+        traps = np.argwhere(game.grid == TRAP)[:num_traps]
+        arrays["traps"][i] = -1
+        arrays["traps"][i, :len(traps)] = traps
+        arrays["enemies"][i] = -1
+        arrays["enemy_dirs"][i] = 0
+        for j, enemy in enumerate(game.enemies[:num_enemies]):
+            arrays["enemies"][i, j] = enemy.pos
+            arrays["enemy_dirs"][i, j] = enemy.current_dir
+    for a in arrays.values():
+        if isinstance(a, np.memmap): a.flush()
+    return MazeCorpus(path)
+
+class MazeCorpus:
+    """Read side of a corpus file. Every section is a memmap; grids are mapped
+    copy-on-write so a game may still edit its maze without touching the file."""
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC: raise ValueError(f"{path} is not a maze corpus")
+            (size,) = struct.unpack("<I", f.read(4))
+            meta = json.loads(f.read(size))
+        self.path = path
+        self.count = meta["count"]
+        self.config = meta["config"]
+        self.seed = meta["seed"]
+        for name, s in meta["sections"].items():
+            mode = "c" if name == "grids" else "r"
+            setattr(self, name, _map(path, s, mode))
+
+    def __len__(self):
+        return self.count
+
+    def order(self, seed):
+        # Seeded visiting order, identical on every machine
+        return np.random.default_rng(seed).permutation(self.count)
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate a memory-mapped maze corpus")
+    parser.add_argument("path")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--enemies", type=int, default=3)
+    parser.add_argument("--keys", type=int, default=1)
+    parser.add_argument("--traps", type=int, default=5)
+    parser.add_argument("--width", type=int, default=GRID_WIDTH)
+    parser.add_argument("--height", type=int, default=GRID_HEIGHT)
+    args = parser.parse_args()
+
+    config = {"enemies": args.enemies, "keys": args.keys, "traps": args.traps,
+              "width": args.width, "height": args.height}
+    corpus = build_corpus(args.path, args.count, config, args.seed)
+    print(f"Wrote {len(corpus)} mazes to {args.path}")
+
+if __name__ == "__main__":
+    main()
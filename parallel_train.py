@@ -0,0 +1,120 @@
+# parallel_train.py
+# Multi-process training. Each worker owns a seeded BatchedMazeEnv and a local
+# agent; after every SYNC_EPISODES episodes per worker the master merges the
+# local Q-tables (weighted by visit counts) and broadcasts the result back.
+# Worker seeds derive from (seed, worker_id, start episode) and merges run in
+# worker order, so a given seed and worker count always reproduces the same
+# table, and a resumed run never replays the mazes it already trained on.
+import argparse
+import multiprocessing as mp
+import os
+import time
+import numpy as np
+
+from config import *
+from agent import QLearningAgent
+from vector_env import BatchedMazeEnv
+
+def merge_q_tables(master, tables, visits):
+    # Visit-weighted average of the worker tables; entries no worker touched
+    # keep the master value.
+    visits = np.asarray(visits, dtype=np.float64)
+    total = visits.sum(axis=0)
+    weighted = (visits * np.asarray(tables)).sum(axis=0)
+    return np.where(total > 0, weighted / np.maximum(total, 1), master)
+
+def _worker(worker_id, seed, start_episode, num_envs, config, conn):
+    env_seed = int(np.random.SeedSequence([seed, worker_id, start_episode]).generate_state(1)[0])
+    env = BatchedMazeEnv(num_envs, config, seed=env_seed)
+    agent = QLearningAgent()
+
+    while True:
+        msg = conn.recv()
+        if msg is None: break
+        q_table, epsilon, episodes = msg
+        agent.q_table = q_table.copy()
+        agent.visits[:] = 0
+        agent.epsilon = epsilon
+
+        start_episodes, start_wins = env.episodes_done, env.wins
+        while env.episodes_done - start_episodes < episodes:
+            env.step(agent)
+        conn.send((agent.q_table, agent.visits.copy(),
+                   env.episodes_done - start_episodes, env.wins - start_wins))
+    conn.close()
+
+def train_parallel(agent, total_episodes=TOTAL_EPISODES, num_workers=None, num_envs=WORKER_NUM_ENVS,
+                   sync_episodes=SYNC_EPISODES, config=None, seed=0, checkpoint=None, start_episode=0):
+    # checkpoint: path saved after the first merge past every CHECKPOINT_EVERY
+    # episodes and at the end; start_episode: episodes a resumed agent has done
+    num_workers = num_workers or os.cpu_count()
+    ctx = mp.get_context("spawn")
+    pipes, procs = [], []
+    for worker_id in range(num_workers):
+        parent, child = ctx.Pipe()
+        proc = ctx.Process(target=_worker, args=(worker_id, seed, start_episode, num_envs, config, child), daemon=True)
+        proc.start()
+        pipes.append(parent); procs.append(proc)
+
+    win_rates = []
+    episodes_done = last_checkpoint = start_episode
+    try:
+        while episodes_done < total_episodes:
+            remaining = total_episodes - episodes_done
+            per_worker = min(sync_episodes, -(-remaining // num_workers))
+            for conn in pipes:
+                conn.send((agent.q_table, agent.epsilon, per_worker))
+            results = [conn.recv() for conn in pipes]
+
+            tables, visits, episodes, wins = zip(*results)
+            agent.q_table = merge_q_tables(agent.q_table, tables, visits)
+            agent.visits += sum(visits)
+            agent.decay_epsilon(sum(episodes))
+            episodes_done += sum(episodes)
+
+            win_rate = 100 * sum(wins) / sum(episodes)
+            win_rates.append(win_rate)
+            print(f"Episode {episodes_done} | Win Rate: {win_rate:.1f}% | Epsilon: {agent.epsilon:.2f}")
+            if checkpoint and episodes_done - last_checkpoint >= CHECKPOINT_EVERY:
+                agent.save_checkpoint(checkpoint, episodes_done)
+                last_checkpoint = episodes_done
+        if checkpoint and episodes_done > last_checkpoint: agent.save_checkpoint(checkpoint, episodes_done)
+    finally:
+        for conn in pipes:
+            conn.send(None)
+        for proc in procs:
+            proc.join()
+    return win_rates
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-process Q-learning training")
+    parser.add_argument("--workers", type=int, default=NUM_WORKERS, help="worker processes (default: all cores)")
+    parser.add_argument("--envs", type=int, default=WORKER_NUM_ENVS, help="mazes per worker")
+    parser.add_argument("--episodes", type=int, default=TOTAL_EPISODES)
+    parser.add_argument("--sync", type=int, default=SYNC_EPISODES, help="episodes per worker between merges")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="training state to resume from and save to")
+    parser.add_argument("--fresh", action="store_true", help="ignore any existing checkpoint")
+    args = parser.parse_args()
+
+    agent = QLearningAgent()
+    start_episode = 0
+    if LOAD_Q_TABLE_IF_EXISTS and not args.fresh:
+        checkpoint = agent.load_checkpoint(args.checkpoint)
+        if checkpoint: start_episode = checkpoint["episode"]
+        elif agent.load(): agent.epsilon = EPSILON_MIN # A bare table carries no epsilon
+
+    workers = args.workers or os.cpu_count()
+    print(f"Starting Parallel Training ({workers} workers x {args.envs} mazes)...")
+    start = time.perf_counter()
+    train_parallel(agent, args.episodes, workers, args.envs, args.sync, seed=args.seed,
+                   checkpoint=args.checkpoint, start_episode=start_episode)
+    elapsed = time.perf_counter() - start
+    episodes = max(args.episodes - start_episode, 0)
+    print(f"{episodes} episodes in {elapsed:.1f}s ({episodes / elapsed:.0f} episodes/sec)")
+
+    if SAVE_Q_TABLE_ON_EXIT:
+        agent.save()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# path_oracle.py
+# Path queries on perfect mazes without searching. The carved cells of a
+# recursive-backtracking maze form a spanning tree, so the path between two
+# cells is unique: it runs up to their lowest common ancestor and back down.
+import numpy as np
+from array import array
+from config import *
+from utils import a_star_invalidate, a_star_path
+
+class TreePathOracle:
+    """Distance and path queries on a tree-shaped maze in O(log n + path length).
+
+    The tree is rooted once, with depths, preorder intervals and one
+    skew-binary jump pointer per node, which answer ancestor and LCA queries
+    in O(log n) steps with O(n) memory. Traps are kept as "+1 on a subtree"
+    updates in a Fenwick tree over preorder positions, so the trap count of
+    any root path is a point query and a trap on the unique path makes the
+    target unreachable. Per-node tables are flat int32 arrays, so very large
+    mazes cost a few bytes per cell. If the open cells do not form a single
+    tree, every query falls back to a_star_path.
+    """
+    def __init__(self, grid):
+        self.grid = grid
+        grid_height, grid_width = grid.shape
+        self.width = grid_width
+        open_mask = (grid != WALL).ravel()
+        self.cells = np.flatnonzero(open_mask).astype(np.int32)
+        n = len(self.cells)
+        node_of = np.full(grid.size, -1, dtype=np.int32)
+        node_of[self.cells] = np.arange(n, dtype=np.int32)
+        self.node_of = array('i', node_of.tobytes())
+        del node_of
+
+        open_2d = open_mask.reshape(grid.shape)
+        edges = (open_2d[:, 1:] & open_2d[:, :-1]).sum() + (open_2d[1:, :] & open_2d[:-1, :]).sum()
+        self.is_tree = n > 0 and edges == n - 1
+        if not self.is_tree: return
+
+        # Iterative DFS from the first open cell: parents, depths, jump
+        # pointers and preorder
+        node_of = self.node_of
+        cells = array('i', self.cells.tobytes())
+        parent = array('i', bytes(4 * n))
+        depth = array('i', bytes(4 * n))
+        jump = array('i', bytes(4 * n))
+        tin = array('i', bytes(4 * n))
+        order = array('i')
+        visited = bytearray(n)
+        visited[0] = 1
+        stack = array('i', [0])
+        while stack:
+            u = stack.pop()
+            tin[u] = len(order)
+            order.append(u)
+            r, c = divmod(cells[u], grid_width)
+            # Children jump two of u's jumps at once when those are equally
+            # long, otherwise just to u
+            j1 = jump[u]
+            j2 = jump[j1]
+            skip = depth[u] - depth[j1] == depth[j1] - depth[j2]
+            for dr, dc in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
+                nr, nc = r + dr, c + dc
+                if 0 <= nr < grid_height and 0 <= nc < grid_width:
+                    v = node_of[nr * grid_width + nc]
+                    if v >= 0 and not visited[v]:
+                        visited[v] = 1
+                        parent[v] = u
+                        depth[v] = depth[u] + 1
+                        jump[v] = j2 if skip else u
+                        stack.append(v)
+        del cells, visited, stack
+        if len(order) != n:
+            self.is_tree = False # Disconnected: a forest, not a tree
+            return
+
+        size = array('i', [1]) * n
+        for u in reversed(order[1:]):
+            size[parent[u]] += size[u]
+        del order
+
+        self.parent = parent
+        self.depth = depth
+        self.jump = jump
+        self.tin = tin
+        self.tout = array('i', (np.frombuffer(tin, dtype=np.int32) + np.frombuffer(size, dtype=np.int32) - 1).tobytes())
+        del size
+
+        self.trapped = bytearray(n)
+        self.fenwick = array('i', bytes(4 * (n + 1)))
+        for cell in np.flatnonzero(grid.ravel() == TRAP).tolist():
+            self._mark(node_of[cell], 1)
+
+    # --- Fenwick tree: range add on preorder intervals, point query ---
+    def _add(self, i, delta):
+        i += 1
+        while i < len(self.fenwick):
+            self.fenwick[i] += delta
+            i += i & -i
+
+    def _mark(self, u, delta):
+        self.trapped[u] = delta > 0
+        self._add(self.tin[u], delta)
+        self._add(self.tout[u] + 1, -delta)
+
+    def _traps_to_root(self, u):
+        i, total = self.tin[u] + 1, 0
+        while i > 0:
+            total += self.fenwick[i]
+            i -= i & -i
+        return total
+
+    def set_trap(self, pos, trapped=True):
+        # Arms or disarms a trap: updates the grid and the subtree below pos
+        self.grid[pos] = TRAP if trapped else EMPTY
+        a_star_invalidate(self.grid)
+        if not self.is_tree: return
+        u = self.node_of[pos[0] * self.width + pos[1]]
+        if self.trapped[u] != trapped:
+            self._mark(u, 1 if trapped else -1)
+
+    def lca(self, u, v):
+        # Nodes at equal depth have jump targets at equal depth, so both
+        # climbs take the jump whenever it does not overshoot
+        depth, jump, parent = self.depth, self.jump, self.parent
+        if depth[u] < depth[v]: u, v = v, u
+        target = depth[v]
+        while depth[u] > target:
+            u = jump[u] if depth[jump[u]] >= target else parent[u]
+        while u != v:
+            if jump[u] != jump[v]: u, v = jump[u], jump[v]
+            else: u, v = parent[u], parent[v]
+        return u
+
+    def _nodes(self, start, end):
+        if not self.is_tree: return None
+        u = self.node_of[start[0] * self.width + start[1]]
+        v = self.node_of[end[0] * self.width + end[1]]
+        if u < 0 or v < 0: return None
+        return u, v
+
+    def _blocked(self, u, v, w):
+        # Traps on the path, excluding the start cell (A* never checks it either)
+        traps = self._traps_to_root(u) + self._traps_to_root(v) - 2 * self._traps_to_root(w)
+        return traps + self.trapped[w] - self.trapped[u] > 0
+
+    def distance(self, start, end):
+        nodes = self._nodes(start, end)
+        if nodes is None:
+            path = a_star_path(self.grid, start, end)
+            return len(path) if path is not None else None
+        u, v = nodes
+        w = self.lca(u, v)
+        if self._blocked(u, v, w): return None
+        return self.depth[u] + self.depth[v] - 2 * self.depth[w]
+
+    def path(self, start, end):
+        nodes = self._nodes(start, end)
+        if nodes is None:
+            return a_star_path(self.grid, start, end)
+        u, v = nodes
+        if u == v: return []
+        w = self.lca(u, v)
+        if self._blocked(u, v, w): return None
+
+        parent, cells = self.parent, self.cells
+        ascent = []
+        while u != w:
+            u = parent[u]
+            ascent.append(u)
+        descent = []
+        while v != w:
+            descent.append(v)
+            v = parent[v]
+        rows, cols = np.divmod(cells[ascent + descent[::-1]], self.width)
+        return list(zip(rows.tolist(), cols.tolist()))
@@ -0,0 +1,96 @@
+# profiler.py
+# Per-phase timers and counters for the training and playback loops.
+#
+#   with profiler.phase("astar"): path = game.path_to(target)
+#
+# While disabled (the default) phase() hands back one shared no-op context
+# manager, so instrumented code pays a method call and nothing else. enable()
+# starts collecting; finish() prints the per-phase table and, if a cProfile
+# capture was requested, dumps it and prints the top functions.
+import cProfile
+import pstats
+import time
+
+class _Phase:
+    __slots__ = ("totals", "name", "start")
+    def __init__(self, totals, name):
+        self.totals = totals
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        entry = self.totals[self.name]
+        entry[0] += time.perf_counter() - self.start
+        entry[1] += 1
+
+class _NullPhase:
+    __slots__ = ()
+    def __enter__(self): pass
+    def __exit__(self, *exc): pass
+
+_NULL_PHASE = _NullPhase()
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.totals = {}   # phase -> [seconds, calls]
+        self.counters = {}
+        self._phases = {}
+        self._capture = None
+        self._capture_path = None
+        self._started = None
+
+    def enable(self, capture_path=None):
+        # capture_path: also record a full cProfile to this file
+        self.enabled = True
+        self._started = time.perf_counter()
+        if capture_path:
+            self._capture_path = capture_path
+            self._capture = cProfile.Profile()
+            self._capture.enable()
+
+    def phase(self, name):
+        if not self.enabled: return _NULL_PHASE
+        phase = self._phases.get(name)
+        if phase is None:
+            self.totals[name] = [0.0, 0]
+            phase = self._phases[name] = _Phase(self.totals, name)
+        return phase
+
+    def count(self, name, n=1):
+        if self.enabled: self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self):
+        wall = time.perf_counter() - self._started
+        lines = [f"{'phase':<12}{'calls':>10}{'total s':>10}{'mean ms':>10}{'% wall':>8}"]
+        for name, (seconds, calls) in sorted(self.totals.items(), key=lambda kv: -kv[1][0]):
+            lines.append(f"{name:<12}{calls:>10}{seconds:>10.3f}{1000 * seconds / max(calls, 1):>10.3f}{100 * seconds / wall:>7.1f}%")
+        other = wall - sum(seconds for seconds, _ in self.totals.values())
+        lines.append(f"{'(other)':<12}{'':>10}{other:>10.3f}{'':>10}{100 * other / wall:>7.1f}%")
+        lines.append(f"{'wall':<12}{'':>10}{wall:>10.3f}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name}: {value} ({value / wall:.0f}/s)")
+        return "\n".join(lines)
+
+    def finish(self):
+        if not self.enabled: return
+        if self._capture:
+            self._capture.disable()
+            self._capture.dump_stats(self._capture_path)
+            print(f"cProfile written to {self._capture_path}")
+            pstats.Stats(self._capture).sort_stats("cumulative").print_stats(15)
+            self._capture = None
+        print(self.summary())
+
+# Shared instance used by main.py and main_app.py
+profiler = Profiler()
+
+def add_profile_args(parser):
+    parser.add_argument("--profile", action="store_true", help="time each loop phase and print a summary")
+    parser.add_argument("--cprofile", metavar="FILE", default=None,
+                        help="also capture a cProfile to FILE (implies --profile)")
+
+def enable_from_args(args):
+    if args.profile or args.cprofile: profiler.enable(args.cprofile)
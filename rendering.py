@@ -0,0 +1,106 @@
+# rendering.py
+# Pygame drawing for MazeGame, kept out of environment.py so headless
+# training and evaluation never import pygame.
+import pygame
+import numpy as np
+from config import *
+
+def render_static_layer(game, assets):
+    # Floor, walls, traps, start and goal: everything that only changes with the maze
+    wall_texture, trap_img, key_img, goal_img = assets
+    grid_height, grid_width = game.grid.shape
+    layer = pygame.Surface((grid_width * CELL_SIZE, grid_height * CELL_SIZE))
+    layer.fill(WHITE)
+
+    def cell_rect(pos): return pygame.Rect(pos[1]*CELL_SIZE, pos[0]*CELL_SIZE, CELL_SIZE, CELL_SIZE)
+    walls = [cell_rect(p) for p in np.argwhere(game.grid == WALL).tolist()]
+    if wall_texture: layer.blits([(wall_texture, rect) for rect in walls], doreturn=False)
+    else:
+        for rect in walls: pygame.draw.rect(layer, BLACK, rect)
+    for p in np.argwhere(game.grid == TRAP).tolist():
+        if trap_img: layer.blit(trap_img, cell_rect(p))
+        else: pygame.draw.rect(layer, RED, cell_rect(p))
+
+    pygame.draw.rect(layer, GRAY, cell_rect(game.start_pos))
+    if goal_img: layer.blit(goal_img, cell_rect(game.goal_pos))
+    else: pygame.draw.rect(layer, GREEN, cell_rect(game.goal_pos))
+    return layer
+
+def draw_sprites(screen, game, assets, path=None):
+    # Everything that moves or disappears; returns the screen rects touched
+    key_img = assets[2]
+    rects = []
+
+    # Draw Keys
+    for k_pos in game.all_key_positions:
+        if k_pos not in game.collected_keys:
+            k_rect = pygame.Rect(k_pos[1]*CELL_SIZE, k_pos[0]*CELL_SIZE, CELL_SIZE, CELL_SIZE)
+            if key_img: rects.append(screen.blit(key_img, k_rect))
+            else: rects.append(pygame.draw.rect(screen, YELLOW, k_rect))
+
+    # Draw Path
+    if path:
+        for pos in path:
+            rects.append(pygame.draw.circle(screen, PATH_COLOR, (pos[1]*CELL_SIZE + CELL_SIZE//2, pos[0]*CELL_SIZE + CELL_SIZE//2), 2))
+
+    # Draw Enemies
+    for r, c in game.swarm.pos.tolist():
+        center = (c*CELL_SIZE + CELL_SIZE//2, r*CELL_SIZE + CELL_SIZE//2)
+        rects.append(pygame.draw.circle(screen, PURPLE, center, CELL_SIZE//2 - 2))
+
+    # Draw Agent
+    center_x = game.agent_pos[1] * CELL_SIZE + CELL_SIZE // 2
+    center_y = game.agent_pos[0] * CELL_SIZE + CELL_SIZE // 2
+    rects.append(pygame.draw.circle(screen, BLUE, (center_x, center_y), CELL_SIZE // 2 - 2))
+    return rects
+
+class MazeRenderer:
+    """Incremental drawing for pygame.display.update(rects).
+
+    The static layer is rendered once per maze, keyed by the game and its
+    maze_version. Each frame only restores that layer under last frame's
+    sprites and draws the new ones; draw() returns the rects that changed. A
+    new maze (or invalidate(), e.g. after an overlay) triggers one full redraw.
+    """
+    def __init__(self, assets):
+        self.assets = assets
+        self._layer = None
+        self._layer_key = None
+        self.layer = None # Layer on screen as of the last draw()
+        self.previous = []
+        self.full_redraw = False # Whether the last draw() repainted the whole screen
+
+    def invalidate(self):
+        self.layer = None
+
+    def static_layer(self, game):
+        key = (id(game), game.maze_version)
+        if key != self._layer_key:
+            self._layer = render_static_layer(game, self.assets)
+            self._layer_key = key
+        return self._layer
+
+    def draw_game_state(self, screen, game, path=None):
+        # Full-frame draw: the cached maze layer plus sprites
+        screen.blit(self.static_layer(game), (0, 0))
+        return draw_sprites(screen, game, self.assets, path)
+
+    def mark(self, rect):
+        # Something else was drawn over the maze this frame: restore it next frame
+        self.previous.append(pygame.Rect(rect))
+
+    def draw(self, screen, game, path=None):
+        layer = self.static_layer(game)
+        self.full_redraw = layer is not self.layer
+        if self.full_redraw:
+            self.layer = layer
+            screen.fill(GRAY)
+            screen.blit(layer, (0, 0))
+            dirty = [screen.get_rect()]
+        else:
+            for rect in self.previous:
+                screen.fill(GRAY, rect)
+                screen.blit(layer, rect, rect)
+            dirty = self.previous
+        self.previous = draw_sprites(screen, game, self.assets, path)
+        return dirty + self.previous
@@ -0,0 +1,144 @@
+# spacetime.py
+# Enemy-aware planning over (cell, time). Instead of polling is_safe and
+# waiting in place, enemy movement is predicted ahead into a reservation
+# table and the agent searches for a timed path (moves and waits) that never
+# shares a cell or swaps places with an enemy.
+import heapq
+from config import *
+from utils import bfs_distances
+
+class ReservationTable:
+    """Cells (and cell-to-cell moves) enemies may occupy at each future tick.
+
+    Cells are flat indices (r * width + c). Tick t means "after t enemy
+    moves"; `moves[t]` holds the (from, to) pairs of the move from tick t to
+    t + 1, used to detect swap collisions. An exact table is filled lazily
+    from a prediction, only as far ahead as the search actually looks.
+    """
+    def __init__(self, horizon, width, source=None):
+        self.horizon = horizon
+        self.width = width
+        self.cells = []
+        self.moves = []
+        self._source = source # Iterator of (cells, moves), one per enemy step
+
+    def _extend(self, t):
+        while len(self.cells) <= t:
+            cells, moves = next(self._source)
+            self.cells.append(set(cells))
+            self.moves.append(set(moves))
+
+    def between(self, t):
+        # (cells occupied at t + 1, moves from t to t + 1); an agent move
+        # frm -> to crosses an enemy when (to, frm) is among the moves
+        if t + 1 >= len(self.cells): self._extend(t + 1)
+        return self.cells[t + 1], self.moves[t]
+
+    @classmethod
+    def exact(cls, swarm, horizon):
+        # EnemySwarm.predict replays the swarm's own RNG, so the prediction is
+        # exactly what the live swarm will do
+        width = swarm.open_dirs.shape[1]
+        table = cls(horizon, width, swarm.predict())
+        table.cells.append({r * width + c for r, c in swarm.positions()})
+        return table
+
+    @classmethod
+    def conservative(cls, enemies, grid, horizon):
+        # Every state an enemy can reach under Enemy.move's rules: delay timer,
+        # no U-turn, reversing only at dead ends.
+        width = grid.shape[1]
+        table = cls(horizon, width)
+        table.cells = [set() for _ in range(horizon + 1)]
+        table.moves = [set() for _ in range(horizon)]
+        for enemy in enemies:
+            states = {(enemy.pos, enemy.current_dir, enemy.timer)}
+            table.cells[0].add(enemy.pos[0] * width + enemy.pos[1])
+            for t in range(horizon):
+                next_states = set()
+                for pos, d, timer in states:
+                    for nxt in _enemy_successors(enemy, grid, pos, d, timer):
+                        next_states.add(nxt)
+                        cell = nxt[0][0] * width + nxt[0][1]
+                        table.cells[t + 1].add(cell)
+                        table.moves[t].add((pos[0] * width + pos[1], cell))
+                states = next_states
+        return table
+
+def _enemy_successors(enemy, grid, pos, d, timer):
+    timer += 1
+    if timer < enemy.move_delay:
+        return [(pos, d, timer)]
+    r, c = pos
+    valid = [o for o in enemy.directions if enemy.is_valid_move(grid, r + o[0], c + o[1])]
+    if not valid:
+        return [(pos, d, 0)]
+    backward = (-d[0], -d[1])
+    options = [o for o in valid if o != backward] or [backward]
+    return [((r + o[0], c + o[1]), o, 0) for o in options]
+
+def plan_timed_path(grid, start, target, table, dist=None):
+    """A* over (cell, tick). Returns the agent's cell after each tick (waits
+    repeat the cell) ending on target, or None if every route collides.
+    Passability matches a_star_path. Past the table's horizon enemies are
+    unknown, so a state reaching it is finished with the plain shortest path
+    (windowed planning; replan before the window runs out). dist is target's
+    bfs_distances field, if the caller already has one."""
+    if dist is None: dist = bfs_distances(grid, target)
+    if dist[start] < 0: return None
+    grid_height, grid_width = grid.shape
+    size = grid_height * grid_width
+    dist = dist.ravel().tolist()
+    start = start[0] * grid_width + start[1]
+    target = target[0] * grid_width + target[1]
+    horizon = table.horizon
+
+    # (f, h, t, cell): on equal f prefer states closer to the target.
+    # States are keyed t * size + cell.
+    open_set = [(dist[start], dist[start], 0, start)]
+    came_from = {}
+    closed = set()
+    successors = {} # cell -> passable neighbours plus itself (wait), built on first expansion
+    while open_set:
+        _, _, t, current = heapq.heappop(open_set)
+        if current == target or t >= horizon:
+            path = []
+            state = t * size + current
+            while state in came_from:
+                path.append(state % size)
+                state = came_from[state]
+            path.reverse()
+            while current != target: # Static shortest path past the horizon
+                current = next(n for n in _neighbors(current, grid_width, size) if dist[n] == dist[current] - 1)
+                path.append(current)
+            return [divmod(cell, grid_width) for cell in path]
+        key = t * size + current
+        if key in closed: continue
+        closed.add(key)
+
+        succ = successors.get(current)
+        if succ is None:
+            succ = successors[current] = [n for n in _neighbors(current, grid_width, size) if dist[n] >= 0] + [current]
+        blocked, crossing = table.between(t)
+        for nxt in succ:
+            if nxt in blocked or (nxt, current) in crossing: continue
+            nxt_key = key + size - current + nxt
+            if nxt_key in closed or nxt_key in came_from: continue
+            came_from[nxt_key] = key
+            heapq.heappush(open_set, (t + 1 + dist[nxt], dist[nxt], t + 1, nxt))
+    return None
+
+def _neighbors(cell, grid_width, size):
+    # Same order as utils.NEIGHBOR_OFFSETS: right, left, down, up
+    c = cell % grid_width
+    out = []
+    if c + 1 < grid_width: out.append(cell + 1)
+    if c > 0: out.append(cell - 1)
+    if cell + grid_width < size: out.append(cell + grid_width)
+    if cell >= grid_width: out.append(cell - grid_width)
+    return out
+
+def plan_around_enemies(game, target, horizon=SPACETIME_HORIZON, exact=True):
+    if exact: table = ReservationTable.exact(game.swarm, horizon)
+    else: table = ReservationTable.conservative(game.enemies, game.grid, horizon)
+    return plan_timed_path(game.grid, game.agent_pos, target, table, game.distance_fields.get(target))
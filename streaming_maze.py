@@ -0,0 +1,170 @@
+# streaming_maze.py
+# Endless / scrolling mazes. Eller's algorithm builds a perfect maze one row at
+# a time while remembering only the set membership of the current row, so
+# rows can be produced lazily forever. WindowedMazeGame is a MazeGame that
+# keeps just a fixed band of those rows, which bounds memory and makes the
+# first frame as cheap as generating that band.
+import random
+import numpy as np
+from config import *
+from utils import a_star_invalidate, flood_fill, mark_route
+from enemy import Enemy
+from environment import MazeGame
+
+def eller_rows(cells_wide, rows=None, rng=random):
+    """Yields grid rows (uint8, width 2 * cells_wide + 1) of a perfect maze.
+
+    Each maze row produces two grid rows: the cell row with its horizontal
+    passages and the wall row below it with the vertical ones. rows=None
+    streams forever; otherwise the last row joins every remaining set and a
+    bottom border closes the maze.
+    """
+    width = 2 * cells_wide + 1
+    yield np.full(width, WALL, dtype=np.uint8) # Top border
+    sets = list(range(cells_wide))
+    next_set = cells_wide
+    r = 0
+    while rows is None or r < rows:
+        last = rows is not None and r == rows - 1
+
+        # 1. Join adjacent cells of different sets (always on the last row)
+        parent = {}
+        def find(s):
+            while s in parent: s = parent[s]
+            return s
+
+        cell_row = np.full(width, WALL, dtype=np.uint8)
+        cell_row[1::2] = EMPTY
+        for c in range(cells_wide - 1):
+            a, b = find(sets[c]), find(sets[c + 1])
+            if a != b and (last or rng.random() < 0.5):
+                cell_row[2 * c + 2] = EMPTY
+                parent[b] = a
+        sets = [find(s) for s in sets]
+        yield cell_row
+        if last: break
+
+        # 2. Every set continues downwards at least once
+        below = np.full(width, WALL, dtype=np.uint8)
+        columns = {}
+        for c, s in enumerate(sets):
+            columns.setdefault(s, []).append(c)
+        new_sets = [None] * cells_wide
+        for s, cols in columns.items():
+            rng.shuffle(cols)
+            for i, c in enumerate(cols):
+                if i == 0 or rng.random() < 0.5:
+                    below[2 * c + 1] = EMPTY
+                    new_sets[c] = s
+        for c in range(cells_wide):
+            if new_sets[c] is None:
+                new_sets[c] = next_set
+                next_set += 1
+        sets = new_sets
+        yield below
+        r += 1
+    yield np.full(width, WALL, dtype=np.uint8) # Bottom border
+
+class WindowedMazeGame(MazeGame):
+    """A MazeGame over an endless streamed maze, holding `window_rows` grid rows.
+
+    Positions are window coordinates like in any MazeGame, so the training and
+    playback loops run on it unchanged; the window's first row is stream row
+    `top`. Each generate_maze() scrolls on instead of carving a new maze: the
+    last goal becomes the new start near the top and the keys, goal and
+    enemies are placed in the rows streamed in below it.
+    """
+    def __init__(self, config=None, window_rows=STREAM_WINDOW_ROWS, rng=random):
+        config = dict(config) if config else {"enemies": 3, "keys": 1, "traps": 5}
+        config["corpus"] = None # Streamed mazes never come from a corpus
+        width = config.get("width", GRID_WIDTH)
+        self.width = 2 * ((width - 1) // 2) + 1
+        self.rows = eller_rows((width - 1) // 2, config.get("rows"), rng)
+        self.window_rows = window_rows
+        self.top = 0
+        super().__init__(config)
+
+    def _next_row(self):
+        row = next(self.rows, None)
+        if row is None: # Finite stream exhausted: pad with wall
+            row = np.full(self.width, WALL, dtype=np.uint8)
+        return row
+
+    def scroll(self, count):
+        # Drops `count` rows at the top and streams as many in at the bottom
+        count = min(count, len(self.grid))
+        if count <= 0: return 0
+        self.grid[:-count] = self.grid[count:]
+        for i in range(len(self.grid) - count, len(self.grid)):
+            self.grid[i] = self._next_row()
+        self.top += count
+        a_star_invalidate(self.grid) # Edited in place: drop A*'s passability mask
+        self._path_oracle = None
+        return count
+
+    def stream_pos(self, pos):
+        # Window position -> row counted from the top of the stream
+        return (pos[0] + self.top, pos[1])
+
+    def generate_maze(self):
+        if self.grid is None:
+            self.grid = np.stack([self._next_row() for _ in range(self.window_rows)])
+            start = (1, 1)
+        else:
+            # Carry on from the last goal, scrolled up to a quarter of the window
+            shift = self.scroll(self.goal_pos[0] - len(self.grid) // 4)
+            start = (self.goal_pos[0] - shift, self.goal_pos[1])
+        while not self._place(start):
+            # Too little of the maze ahead is connected inside the window:
+            # stream on and start again from an open cell near the top
+            self.scroll(2)
+            start = self._open_cell(len(self.grid) // 4)
+
+        self._key_plan = None
+        self._distance_fields = None
+        self.maze_version += 1
+        self.reset()
+
+    def _open_cell(self, rows, exclude=()):
+        # Uniform EMPTY cell in the window's first `rows` rows
+        cells = [tuple(p) for p in np.argwhere(self.grid[:rows] == EMPTY).tolist()]
+        cells = [p for p in cells if p not in exclude]
+        if not cells: raise ValueError("maze stream exhausted")
+        return random.choice(cells)
+
+    def _place(self, start):
+        # Keys and goal go below the start, among the cells it reaches inside
+        # the window; their traced routes stay trap-free as in MazeGame
+        width = self.grid.shape[1]
+        came = flood_fill(self.grid, start)
+        reach = np.flatnonzero(np.frombuffer(came, dtype=np.uint8))
+        ahead = reach[reach // width > start[0]]
+        num_keys = self.config.get("keys", 1)
+        if len(ahead) < num_keys + 1: return False
+
+        # Goal among the deepest third of what lies ahead, keys anywhere else
+        ahead = ahead[np.argsort(ahead // width, kind="stable")]
+        goal = int(ahead[random.randrange(len(ahead) * 2 // 3, len(ahead))])
+        others = ahead[ahead != goal]
+        keys = [int(others[i]) for i in random.sample(range(len(others)), num_keys)]
+        self.start_pos = start
+        self.goal_pos = divmod(goal, width)
+        self.all_key_positions = [divmod(k, width) for k in keys]
+        self.collected_keys = []
+        placements = {self.start_pos, self.goal_pos, *self.all_key_positions}
+
+        protected = bytearray(len(came))
+        for target in [self.goal_pos] + self.all_key_positions:
+            mark_route(came, width, target, protected)
+
+        # Traps (never on a protected route), then enemies. Rows kept from the
+        # last maze keep their traps, so only top the window up to the count
+        free = [p for p in np.argwhere(self.grid == EMPTY).tolist()
+                if not protected[p[0] * width + p[1]] and tuple(p) not in placements]
+        missing = self.config.get("traps", 5) - int(np.count_nonzero(self.grid == TRAP))
+        for pos in random.sample(free, max(0, min(missing, len(free)))):
+            self.grid[tuple(pos)] = TRAP
+        num_enemies = self.config.get("enemies", 3)
+        self.enemies = [Enemy(self.grid, [self._open_cell(len(self.grid), placements)])
+                        for _ in range(num_enemies)]
+        return True
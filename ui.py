@@ -39,6 +39,75 @@ def draw_rounded_rect(surface, rect, color, corner_radius, alpha=None):
     else:
         pygame.draw.rect(surface, color, rect, border_radius=corner_radius)
 
+class TextCache:
+    """One font, loaded once, plus its rendered text surfaces keyed by content."""
+    def __init__(self, size, name=None, limit=256):
+        self.font = pygame.font.Font(name, size)
+        self.limit = limit
+        self.surfaces = {}
+
+    def render(self, text, color):
+        key = (text, color)
+        surf = self.surfaces.get(key)
+        if surf is None:
+            if len(self.surfaces) >= self.limit: self.surfaces.clear() # Counters never repeat forever
+            surf = self.surfaces[key] = self.font.render(text, True, color)
+        return surf
+
+class Dashboard:
+    """HUD bar of fixed text fields and buttons.
+
+    draw() only repaints fields whose text changed since the last call (and
+    buttons whose label changed) and returns the rects it touched, for
+    pygame.display.update. invalidate() forces a full repaint, e.g. after
+    something else painted over the bar.
+    """
+    def __init__(self, rect, font_size=28, button_font_size=24, bg=BLACK):
+        self.rect = pygame.Rect(rect)
+        self.bg = bg
+        self.text = TextCache(font_size)
+        self.button_text = TextCache(button_font_size)
+        self.fields = {}  # name -> [topleft, color, text drawn, rect drawn]
+        self.buttons = {} # button -> label drawn
+        self.full = True
+
+    def add_field(self, name, topleft, color=WHITE):
+        self.fields[name] = [topleft, color, None, None]
+
+    def add_button(self, button):
+        self.buttons[button] = None
+
+    def invalidate(self):
+        self.full = True
+
+    def draw(self, screen, **values):
+        dirty = []
+        if self.full:
+            screen.fill(self.bg, self.rect)
+            dirty.append(self.rect)
+            for field in self.fields.values(): field[2] = field[3] = None
+            for button in self.buttons: self.buttons[button] = None
+            self.full = False
+
+        for name, text in values.items():
+            field = self.fields[name]
+            if text == field[2]: continue
+            if field[3]: # Erase the old text
+                screen.fill(self.bg, field[3])
+                dirty.append(field[3])
+            field[2] = text
+            field[3] = screen.blit(self.text.render(text, field[1]), field[0])
+            dirty.append(field[3])
+
+        for button, label in self.buttons.items():
+            if button.text == label: continue
+            area = button.rect.inflate(0, 8) # Includes the drop shadow
+            screen.fill(self.bg, area)
+            button.draw(screen, self.button_text.font)
+            self.buttons[button] = button.text
+            dirty.append(area)
+        return dirty
+
 class Button:
     def __init__(self, x, y, w, h, text, action=None, color_scheme="default"):
         self.rect = pygame.Rect(x, y, w, h)
@@ -64,6 +133,10 @@ class Button:
         if self.hovered: text_rect.y += 1 
         screen.blit(text_surf, text_rect)
 
+    def state_key(self):
+        # Everything draw() depends on: redraw only when this changes
+        return (self.text, self.hovered, self.color_scheme)
+
     def handle_event(self, event):
         if event.type == pygame.MOUSEMOTION: self.hovered = self.rect.collidepoint(event.pos)
         elif event.type == pygame.MOUSEBUTTONDOWN:
@@ -92,6 +165,9 @@ class NumberSelector:
         screen.blit(val_surf, val_rect)
         self.btn_minus.draw(screen, font); self.btn_plus.draw(screen, font)
 
+    def state_key(self):
+        return (self.value, self.btn_minus.state_key(), self.btn_plus.state_key())
+
     def handle_event(self, event):
         if self.btn_minus.handle_event(event) == self.btn_minus.action:
             if event.type == pygame.MOUSEBUTTONDOWN and self.btn_minus.hovered: self.value = max(self.min, self.value - 1)
@@ -111,6 +187,9 @@ class ToggleSelector:
         draw_text_aligned(screen, font, f"{self.label}:", (self.left_x, self.y + 7), align="left")
         self.btn.draw(screen, font)
 
+    def state_key(self):
+        return (self.state, self.btn.state_key())
+
     def handle_event(self, event):
         if self.btn.handle_event(event) == "toggle":
              if event.type == pygame.MOUSEBUTTONDOWN and self.btn.hovered:
@@ -156,17 +235,39 @@ class StartMenu:
         )
         self.config = {}
 
-    def draw_background(self, screen):
+    def render_background(self, title_font):
+        # Gradient, panel and glowing title never change: rendered once per run()
+        background = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
         height = WINDOW_HEIGHT
         for y in range(height):
             alpha = y / height
             r = int(COLOR_BG_TOP[0] * (1 - alpha) + COLOR_BG_BOTTOM[0] * alpha)
             g = int(COLOR_BG_TOP[1] * (1 - alpha) + COLOR_BG_BOTTOM[1] * alpha)
             b = int(COLOR_BG_TOP[2] * (1 - alpha) + COLOR_BG_BOTTOM[2] * alpha)
-            pygame.draw.line(screen, (r, g, b), (0, y), (WINDOW_WIDTH, y))
+            pygame.draw.line(background, (r, g, b), (0, y), (WINDOW_WIDTH, y))
             
-        draw_rounded_rect(screen, self.panel_rect, (0,0,0), 20, alpha=80)
-        pygame.draw.rect(screen, COLOR_ACCENT, self.panel_rect, 2, border_radius=20)
+        draw_rounded_rect(background, self.panel_rect, (0,0,0), 20, alpha=80)
+        pygame.draw.rect(background, COLOR_ACCENT, self.panel_rect, 2, border_radius=20)
+
+        title_text = "MAZE RUNNER // AI CONFIG"
+        title_pos = (WINDOW_WIDTH//2, 30) # Higher up
+        
+        for offset in range(4, 0, -1):
+            alpha = 50 - (offset * 10)
+            glow_surf = title_font.render(title_text, True, (*COLOR_ACCENT, alpha))
+            glow_rect = glow_surf.get_rect(center=title_pos)
+            background.blit(glow_surf, (glow_rect.x-offset, glow_rect.y-offset))
+            background.blit(glow_surf, (glow_rect.x+offset, glow_rect.y+offset))
+        
+        draw_text_aligned(background, title_font, title_text, title_pos, align="center", color=COLOR_TEXT)
+        return background
+
+    def widget_areas(self):
+        # Screen area each widget may paint (label, controls and drop shadows)
+        areas = [(sel, pygame.Rect(self.panel_rect.left + 10, sel.y - 14, self.panel_rect.width - 20, 46))
+                 for sel in self.selectors]
+        areas.append((self.start_btn, self.start_btn.rect.inflate(4, 12)))
+        return areas
 
     def run(self, screen):
         clock = pygame.time.Clock()
@@ -177,26 +278,25 @@ class StartMenu:
             title_font = pygame.font.Font(None, 60)
             ui_font = pygame.font.Font(None, 30)
         
-        running = True
-        while running:
-            self.draw_background(screen)
-            
-            title_text = "MAZE RUNNER // AI CONFIG"
-            title_pos = (WINDOW_WIDTH//2, 30) # Higher up
-            
-            for offset in range(4, 0, -1):
-                alpha = 50 - (offset * 10)
-                glow_surf = title_font.render(title_text, True, (*COLOR_ACCENT, alpha))
-                glow_rect = glow_surf.get_rect(center=title_pos)
-                screen.blit(glow_surf, (glow_rect.x-offset, glow_rect.y-offset))
-                screen.blit(glow_surf, (glow_rect.x+offset, glow_rect.y+offset))
-            
-            draw_text_aligned(screen, title_font, title_text, title_pos, align="center", color=COLOR_TEXT)
-            
-            for sel in self.selectors: sel.draw(screen, ui_font)
-            self.start_btn.draw(screen, ui_font)
-            
-            for event in pygame.event.get():
+        background = self.render_background(title_font)
+        screen.blit(background, (0, 0))
+        pygame.display.flip()
+        drawn = {} # widget -> state_key it was last drawn with
+
+        while True:
+            # Repaint only widgets whose value or hover state changed
+            dirty = []
+            for widget, area in self.widget_areas():
+                key = widget.state_key()
+                if drawn.get(widget) == key: continue
+                screen.blit(background, area, area)
+                widget.draw(screen, ui_font)
+                drawn[widget] = key
+                dirty.append(area)
+            if dirty: pygame.display.update(dirty)
+
+            # Sleep until there is input; tick caps redraws during mouse motion
+            for event in [pygame.event.wait()] + pygame.event.get():
                 if event.type == pygame.QUIT: return None
                 for sel in self.selectors: sel.handle_event(event)
                 res = self.start_btn.handle_event(event)
@@ -207,5 +307,4 @@ class StartMenu:
                         "runs": self.selectors[4].value, "heatmaps": self.selectors[5].state
                     }
                     return self.config
-            
-            pygame.display.flip(); clock.tick(30)
\ No newline at end of file
+            clock.tick(30)
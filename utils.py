@@ -1,49 +1,210 @@
 # utils.py
 import heapq
+import weakref
+import numpy as np
+from collections import deque
 from config import *
 
 def manhattan_distance(p1, p2):
     return abs(p1[0] - p2[0]) + abs(p1[1] - p2[1])
 
+NEIGHBOR_OFFSETS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+
+class AStarEngine:
+    """A* over flat cell indices with buffers that survive between calls.
+
+    Score and parent lists are preallocated once per grid size and invalidated
+    by bumping a generation stamp, and the passability mask is built once per
+    grid object. Expansion and tie-breaking order match the original dict-based
+    search, so paths are identical.
+    """
+    def __init__(self):
+        self.size = 0
+        self.generation = 0
+        self._masks = {}
+
+    def _allocate(self, size):
+        self.size = size
+        self.generation = 0
+        self.g_score = [0] * size
+        self.g_stamp = [0] * size
+        self.open_stamp = [0] * size
+        self.came_from = [0] * size
+
+    def passable(self, grid):
+        key = id(grid)
+        entry = self._masks.get(key)
+        if entry is not None and entry[0]() is grid:
+            return entry[1]
+        mask = ((grid != WALL) & (grid != TRAP)).ravel().tolist()
+        self._masks[key] = (weakref.ref(grid, lambda _, key=key: self._masks.pop(key, None)), mask)
+        return mask
+
+    def invalidate(self, grid):
+        # Call after editing a grid in place (e.g. adding traps) that was already searched
+        self._masks.pop(id(grid), None)
+
+    def search(self, grid, start, end):
+        grid_height, grid_width = grid.shape
+        if grid_height * grid_width != self.size:
+            self._allocate(grid_height * grid_width)
+        self.generation += 1
+        gen = self.generation
+        passable = self.passable(grid)
+        g_score, g_stamp, open_stamp, came_from = self.g_score, self.g_stamp, self.open_stamp, self.came_from
+
+        end_r, end_c = end
+        start_idx = start[0] * grid_width + start[1]
+        end_idx = end_r * grid_width + end_c
+        g_score[start_idx] = 0
+        g_stamp[start_idx] = gen
+        open_stamp[start_idx] = gen
+        # (f, flat index) orders ties exactly like (f, (r, c))
+        open_set = [(0, start_idx)]
+
+        while open_set:
+            _, current = heapq.heappop(open_set)
+            open_stamp[current] = 0
+
+            if current == end_idx:
+                path = []
+                while current != start_idx:
+                    path.append(divmod(current, grid_width))
+                    current = came_from[current]
+                return path[::-1]
+
+            r, c = divmod(current, grid_width)
+            tentative_g_score = g_score[current] + 1
+            for dr, dc in NEIGHBOR_OFFSETS:
+                nr, nc = r + dr, c + dc
+                if 0 <= nr < grid_height and 0 <= nc < grid_width:
+                    neighbor = nr * grid_width + nc
+                    if not passable[neighbor]: continue
+                    if g_stamp[neighbor] != gen or tentative_g_score < g_score[neighbor]:
+                        came_from[neighbor] = current
+                        g_score[neighbor] = tentative_g_score
+                        g_stamp[neighbor] = gen
+                        if open_stamp[neighbor] != gen:
+                            f = tentative_g_score + abs(nr - end_r) + abs(nc - end_c)
+                            heapq.heappush(open_set, (f, neighbor))
+                            open_stamp[neighbor] = gen
+        return None
+
+_engine = AStarEngine()
+
 def a_star_path(grid, start, end):
+    return _engine.search(grid, start, end)
+
+def a_star_invalidate(grid):
+    # Call after editing a grid in place (e.g. adding traps) that was already searched
+    _engine.invalidate(grid)
+
+def bfs_distances(grid, source):
+    """Step counts from source to every reachable cell (-1 where unreachable).
+
+    Uses the same passability rules as a_star_path, so on any grid the value at
+    a cell equals the length of the A* path between it and source.
+    """
     grid_height, grid_width = grid.shape
-    open_set = [(0, start)]
-    came_from = {}
-    
-    g_score = { (r,c): float('inf') for r in range(grid_height) for c in range(grid_width) }
-    g_score[start] = 0
-    
-    f_score = { (r,c): float('inf') for r in range(grid_height) for c in range(grid_width) }
-    f_score[start] = manhattan_distance(start, end)
-    
-    open_set_hash = {start} # Faster lookups
-
-    while open_set:
-        _, current = heapq.heappop(open_set)
-        open_set_hash.discard(current)
-        
-        if current == end:
-            path = []
-            while current in came_from:
-                path.append(current)
-                current = came_from[current]
-            return path[::-1]
-        
+    passable = (grid != WALL) & (grid != TRAP)
+    dist = np.full((grid_height, grid_width), -1, dtype=np.int32)
+    dist[source] = 0
+    queue = deque([source])
+    while queue:
+        r, c = queue.popleft()
+        d = dist[r, c] + 1
         for dr, dc in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-            neighbor = (current[0] + dr, current[1] + dc)
-            
-            # Bounds and collision check
-            if (0 <= neighbor[0] < grid_height and 
-                0 <= neighbor[1] < grid_width and 
-                grid[neighbor[0], neighbor[1]] not in [WALL, TRAP]):
-                
-                tentative_g_score = g_score[current] + 1
-                if tentative_g_score < g_score[neighbor]:
-                    came_from[neighbor] = current
-                    g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = g_score[neighbor] + manhattan_distance(neighbor, end)
-                    
-                    if neighbor not in open_set_hash:
-                        heapq.heappush(open_set, (f_score[neighbor], neighbor))
-                        open_set_hash.add(neighbor)
-    return None
\ No newline at end of file
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < grid_height and 0 <= nc < grid_width and passable[nr, nc] and dist[nr, nc] < 0:
+                dist[nr, nc] = d
+                queue.append((nr, nc))
+    return dist
+
+def flood_fill(grid, source):
+    """Single BFS from source over the cells a_star_path may enter.
+
+    Returns a bytearray over flat cells: 0 = unreached, 5 = source, otherwise
+    1 + the NEIGHBOR_OFFSETS index of the step that reached the cell. One byte
+    per cell keeps this usable on very large grids.
+    """
+    grid_height, grid_width = grid.shape
+    passable = ((grid != WALL) & (grid != TRAP)).astype(np.uint8).tobytes()
+    came = bytearray(grid_height * grid_width)
+    start = source[0] * grid_width + source[1]
+    came[start] = 5
+    queue = deque([start])
+    while queue:
+        cell = queue.popleft()
+        c = cell % grid_width
+        if c + 1 < grid_width and passable[cell + 1] and not came[cell + 1]:
+            came[cell + 1] = 1; queue.append(cell + 1)
+        if c > 0 and passable[cell - 1] and not came[cell - 1]:
+            came[cell - 1] = 2; queue.append(cell - 1)
+        below = cell + grid_width
+        if below < len(came) and passable[below] and not came[below]:
+            came[below] = 3; queue.append(below)
+        above = cell - grid_width
+        if above >= 0 and passable[above] and not came[above]:
+            came[above] = 4; queue.append(above)
+    return came
+
+def mark_route(came, grid_width, target, marks):
+    """Marks the flood_fill route from target back to the source in `marks`
+    (a bytearray over flat cells). Stops at already-marked cells, so marking
+    several targets costs the size of their union. Returns the number of newly
+    marked cells, or -1 if target was never reached."""
+    step = [0, 1, -1, grid_width, -grid_width]
+    cell = target[0] * grid_width + target[1]
+    if not came[cell]: return -1
+    count = 0
+    while not marks[cell]:
+        marks[cell] = 1
+        count += 1
+        if came[cell] == 5: break
+        cell -= step[came[cell]]
+    return count
+
+def path_from_field(dist, start):
+    # Walks down a bfs_distances field; on tree mazes this is the A* path
+    d = dist[start]
+    if d < 0: return None
+    grid_height, grid_width = dist.shape
+    path, (r, c) = [], start
+    while d > 0:
+        for dr, dc in NEIGHBOR_OFFSETS:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < grid_height and 0 <= nc < grid_width and dist[nr, nc] == d - 1:
+                break
+        r, c, d = nr, nc, d - 1
+        path.append((r, c))
+    return path
+
+def held_karp_order(dist):
+    """Exact shortest visiting order of every key.
+
+    dist is a (K+2)x(K+2) matrix over [start, key_1..key_K, goal]; returns the
+    key indices (0-based) in visiting order, ending at the goal. Unreachable
+    legs are inf. O(2^K * K^2), fine for the handful of keys a maze holds.
+    """
+    k = len(dist) - 2
+    goal = k + 1
+    best = {(1 << i, i): (dist[0][i + 1], None) for i in range(k)}
+    for mask in range(1, 1 << k):
+        for last in range(k):
+            if (mask, last) not in best: continue
+            cost = best[(mask, last)][0]
+            for nxt in range(k):
+                if mask & (1 << nxt): continue
+                key = (mask | (1 << nxt), nxt)
+                candidate = cost + dist[last + 1][nxt + 1]
+                if key not in best or candidate < best[key][0]:
+                    best[key] = (candidate, last)
+    if k == 0: return []
+
+    full = (1 << k) - 1
+    last = min(range(k), key=lambda i: best[(full, i)][0] + dist[i + 1][goal])
+    order, mask = [], full
+    while last is not None:
+        order.append(last)
+        last, mask = best[(mask, last)][1], mask & ~(1 << last)
+    return order[::-1]
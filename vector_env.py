@@ -0,0 +1,259 @@
+# vector_env.py
+# Headless training engine that advances many mazes in lockstep with NumPy.
+# Every tick moves each agent one cell along its current plan, moves every
+# enemy in every maze and resolves collisions with array ops, then feeds all
+# finished strategic steps to the Q-table in one batched update.
+import argparse
+import random
+import time
+import numpy as np
+from collections import deque
+
+from config import *
+from environment import MazeGame
+from agent import QLearningAgent
+from enemy import DIRECTIONS, choose_directions
+
+class BatchedMazeEnv:
+    def __init__(self, num_envs=BATCH_NUM_ENVS, config=None, seed=None):
+        self.config = config if config else {
+            "enemies": 3, "keys": 1, "traps": 5
+        }
+        self.n = num_envs
+        self.rng = np.random.default_rng(seed)
+        if seed is not None: random.seed(seed)
+        self._generator = MazeGame(self.config)
+        # Read back from the generator: a maze corpus overrides the counts
+        self.num_keys = self._generator.maze_config.get("keys", 1)
+        self.num_enemies = self._generator.maze_config.get("enemies", 3)
+
+        n, k, e = self.n, self.num_keys, self.num_enemies
+        h, w = self._generator.grid.shape
+        self.arange = np.arange(n)
+
+        # --- Maze layers (one slice per environment) ---
+        self.grids = np.empty((n, h, w), dtype=np.uint8)
+        self.open_dirs = np.empty((n, h, w), dtype=np.uint8)
+        # Distance fields towards each key (0..k-1) and the goal (k)
+        self.dist = np.empty((n, k + 1, h, w), dtype=np.int32)
+        self.start = np.empty((n, 2), dtype=np.int64)
+        self.keys = np.empty((n, k, 2), dtype=np.int64)
+        self.goal = np.empty((n, 2), dtype=np.int64)
+        self.episodes_on_maze = np.zeros(n, dtype=np.int64)
+
+        # --- Dynamic state ---
+        self.agent = np.empty((n, 2), dtype=np.int64)
+        self.collected = np.zeros((n, k), dtype=bool)
+        self.enemy_pos = np.zeros((n, e, 2), dtype=np.int64)
+        self.enemy_dir = np.full((n, e), 4, dtype=np.int64)
+        self.enemy_timer = np.zeros((n, e), dtype=np.int64)
+
+        # --- Strategic step bookkeeping ---
+        self.state = np.zeros(n, dtype=np.int64)
+        self.action = np.zeros(n, dtype=np.int64)
+        self.target = np.zeros(n, dtype=np.int64)
+        self.remaining = np.zeros(n, dtype=np.int64)  # Cells left on the current plan
+        self.walked = np.zeros(n, dtype=np.int64)
+        self.strategic_steps = np.zeros(n, dtype=np.int64)
+
+        # --- Stats ---
+        self.episodes_done = 0
+        self.wins = 0
+        self.recent_wins = deque(maxlen=100)
+
+        for i in range(n):
+            self._load_maze(i)
+            self._reset_env(i)
+
+    def _load_maze(self, i):
+        game = self._generator
+        game.generate_maze()
+        self.grids[i] = game.grid
+        self.open_dirs[i] = game.swarm.open_dirs
+        self.start[i] = game.start_pos
+        self.goal[i] = game.goal_pos
+        # Keys are stored in MazeGame.key_plan order, so the next target is
+        # simply the first uncollected slot
+        self.keys[i] = game.key_plan
+        for t, pos in enumerate(game.key_plan + [game.goal_pos]):
+            self.dist[i, t] = game.distance_fields[pos]
+
+        # generate_maze may spawn fewer enemies than requested on cramped grids.
+        # Missing ones are parked on the (0, 0) border wall: no open directions,
+        # never reachable by the agent.
+        self.enemy_pos[i] = 0
+        self.enemy_dir[i] = 4
+        self.enemy_timer[i] = 0
+        count = min(len(game.swarm), self.num_enemies)
+        self.enemy_pos[i, :count] = game.swarm.pos[:count]
+        self.enemy_dir[i, :count] = game.swarm.dir[:count]
+
+    def _reset_env(self, i):
+        self.agent[i] = self.start[i]
+        self.collected[i] = False
+        self.state[i] = 0
+        self.remaining[i] = 0
+        self.strategic_steps[i] = 0
+
+    def get_states(self, idx):
+        has_key = self.collected[idx].all(axis=1)
+        goal_discovered = has_key & (self.agent[idx] == self.goal[idx]).all(axis=1)
+        return has_key.astype(np.int64) * 2 + goal_discovered
+
+    def _next_keys(self, idx):
+        # Mirrors MazeGame.key_pos: first uncollected key of the plan
+        return (~self.collected[idx]).argmax(axis=1)
+
+    def move_enemies(self, active):
+        if self.num_enemies == 0: return
+        self.enemy_timer[active] += 1
+        moving = active[:, None] & (self.enemy_timer >= ENEMY_SPEED_DELAY)
+        self.enemy_timer[moving] = 0
+
+        r, c = self.enemy_pos[..., 0], self.enemy_pos[..., 1]
+        masks = self.open_dirs[self.arange[:, None], r, c]
+        choice, can_move = choose_directions(masks, self.enemy_dir, self.rng)
+        can_move &= moving
+        self.enemy_dir = np.where(can_move, choice, self.enemy_dir)
+        self.enemy_pos += DIRECTIONS[self.enemy_dir] * can_move[..., None]
+
+    def step(self, agent):
+        # 1. Strategic decisions for environments that finished their last plan
+        reward = np.zeros(self.n)
+        finished = np.zeros(self.n, dtype=bool)
+        done = np.zeros(self.n, dtype=bool)
+        won = np.zeros(self.n, dtype=bool)
+
+        deciding = self.remaining == 0
+        self.move_enemies(deciding)
+        idx = np.nonzero(deciding)[0]
+        if len(idx):
+            actions = agent.choose_actions(self.state[idx], self.rng)
+            has_key = self.collected[idx].all(axis=1)
+            seek_key = (actions == 0) & ~has_key
+            self.action[idx] = actions
+            self.target[idx] = np.where(seek_key, self._next_keys(idx), self.num_keys)
+            path_len = self.dist[idx, self.target[idx], self.agent[idx, 0], self.agent[idx, 1]]
+
+            # Unreachable or already standing on the target: dead end
+            dead = idx[path_len <= 0]
+            reward[dead] += DEAD_END_PENALTY
+            finished[dead] = done[dead] = True
+
+            self.remaining[idx] = np.maximum(path_len, 0)
+            self.walked[idx] = 0
+
+        # 2. Walk one cell along the distance field
+        walking = self.remaining > 0
+        idx = np.nonzero(walking)[0]
+        if len(idx):
+            r, c = self.agent[idx, 0], self.agent[idx, 1]
+            here = self.dist[idx, self.target[idx], r, c]
+            neighbours = self.dist[idx[:, None], self.target[idx, None],
+                                   r[:, None] + DIRECTIONS[None, :4, 0],
+                                   c[:, None] + DIRECTIONS[None, :4, 1]]
+            move = (neighbours == here[:, None] - 1).argmax(axis=1)
+            self.agent[idx] += DIRECTIONS[move]
+            self.remaining[idx] -= 1
+            self.walked[idx] += 1
+
+        self.move_enemies(walking)
+
+        # 3. Collisions
+        if self.num_enemies:
+            hit = walking & (self.enemy_pos == self.agent[:, None, :]).all(axis=2).any(axis=1)
+            reward[hit] += ENEMY_PENALTY
+            finished[hit] = done[hit] = True
+            self.remaining[hit] = 0
+        else:
+            hit = np.zeros(self.n, dtype=bool)
+
+        # 4. Plans completed this tick
+        arrived = walking & ~hit & (self.remaining == 0)
+        idx = np.nonzero(arrived)[0]
+        if len(idx):
+            reward[idx] += self.walked[idx] * STEP_PENALTY
+            at_key = (self.keys[idx] == self.agent[idx, None, :]).all(axis=2) & ~self.collected[idx]
+            reward[idx] += at_key.any(axis=1) * KEY_REWARD
+            self.collected[idx] |= at_key
+
+            at_goal = (self.agent[idx] == self.goal[idx]).all(axis=1) & self.collected[idx].all(axis=1)
+            reward[idx] += at_goal * GOAL_REWARD
+            won[idx] = done[idx] = at_goal
+            finished[idx] = True
+
+        # 5. One batched Q update for every finished strategic step
+        idx = np.nonzero(finished)[0]
+        if len(idx):
+            next_states = self.get_states(idx)
+            agent.learn_batch(self.state[idx], self.action[idx], reward[idx], next_states)
+            self.state[idx] = next_states
+            self.strategic_steps[idx] += 1
+            done[idx] |= self.strategic_steps[idx] >= MAX_STRATEGIC_STEPS
+
+        # 6. Episode bookkeeping
+        for i in np.nonzero(done)[0]:
+            self.episodes_done += 1
+            self.wins += int(won[i])
+            self.recent_wins.append(int(won[i]))
+            self.episodes_on_maze[i] += 1
+            if self.episodes_on_maze[i] % NEW_MAZE_FREQUENCY == 0:
+                self._load_maze(i)
+            self._reset_env(i)
+        agent.decay_epsilon(int(done.sum()))
+        return int(done.sum())
+
+def train_batched(agent, total_episodes=TOTAL_EPISODES, num_envs=BATCH_NUM_ENVS, config=None, seed=None,
+                  checkpoint=None, start_episode=0):
+    # checkpoint: path saved every CHECKPOINT_EVERY episodes and at the end.
+    # start_episode: episodes already trained (resumed agent). A resumed run
+    # seeds its mazes from (seed, start_episode), so it never replays the
+    # maze and enemy stream it already trained on.
+    if seed is not None and start_episode:
+        seed = int(np.random.SeedSequence([seed, start_episode]).generate_state(1)[0])
+    env = BatchedMazeEnv(num_envs, config, seed)
+    win_rates = []
+    next_report = start_episode // 100 * 100 + 100
+    next_checkpoint = start_episode + CHECKPOINT_EVERY
+    while start_episode + env.episodes_done < total_episodes:
+        env.step(agent)
+        episodes = start_episode + env.episodes_done
+        while episodes >= next_report:
+            current_win_rate = sum(env.recent_wins)
+            win_rates.append(current_win_rate)
+            print(f"Episode {next_report} | Win Rate: {current_win_rate}% | Epsilon: {agent.epsilon:.2f}")
+            next_report += 100
+        if checkpoint and episodes >= next_checkpoint:
+            agent.save_checkpoint(checkpoint, episodes)
+            next_checkpoint = episodes + CHECKPOINT_EVERY
+    if checkpoint: agent.save_checkpoint(checkpoint, start_episode + env.episodes_done)
+    return win_rates
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless batched Q-learning training")
+    parser.add_argument("--envs", type=int, default=BATCH_NUM_ENVS, help="mazes stepped in lockstep")
+    parser.add_argument("--episodes", type=int, default=TOTAL_EPISODES)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="training state to resume from and save to")
+    parser.add_argument("--fresh", action="store_true", help="ignore any existing checkpoint")
+    args = parser.parse_args()
+
+    agent = QLearningAgent()
+    start_episode = 0
+    if LOAD_Q_TABLE_IF_EXISTS and not args.fresh:
+        checkpoint = agent.load_checkpoint(args.checkpoint)
+        if checkpoint: start_episode = checkpoint["episode"]
+        elif agent.load(): agent.epsilon = EPSILON_MIN # A bare table carries no epsilon
+
+    print(f"Starting Batched Training ({args.envs} mazes)...")
+    start = time.perf_counter()
+    train_batched(agent, args.episodes, args.envs, seed=args.seed, checkpoint=args.checkpoint, start_episode=start_episode)
+    elapsed = time.perf_counter() - start
+    episodes = max(args.episodes - start_episode, 0)
+    print(f"{episodes} episodes in {elapsed:.1f}s ({episodes / elapsed:.0f} episodes/sec)")
+
+    if SAVE_Q_TABLE_ON_EXIT:
+        agent.save()
+
+if __name__ == "__main__":
+    main()